@@ -0,0 +1,16 @@
+"""
+No-op logger shared by the backend's diagnostic scripts.
+"""
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class NullLogger:
+    """Logger stand-in whose methods accept anything and do nothing."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return _noop
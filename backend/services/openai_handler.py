@@ -1,19 +1,46 @@
 import os
+import threading
 from openai import OpenAI
 import logging
-from typing import List, Dict, Generator
+from typing import List, Dict, Generator, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
+
+
+_CLIENT: Optional[OpenAI] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _get_client(api_key: str) -> OpenAI:
+    """Return the process-wide OpenAI client, creating it on first use."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = OpenAI(api_key=api_key)
+        return _CLIENT
+
+
+@lru_cache(maxsize=256)
+def _build_context(recent_messages: Tuple[Tuple[str, str], ...], max_length: int) -> str:
+    """Join (role, content head) pairs of recent messages into context text."""
+    context = " ".join(
+        content for role, content in recent_messages if role != "system" and content
+    )
+    return context[-max_length:]
 
 
 class ConversationManager:
     """Handles OpenAI LLM interactions with conversation context."""
 
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, client: Optional[OpenAI] = None):
         self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-
-        self.client = OpenAI(api_key=self.api_key)
+        if client is not None:
+            # Caller-supplied client (e.g. a local stand-in); no key needed
+            self.client = client
+        else:
+            if not self.api_key:
+                raise ValueError("OPENAI_API_KEY environment variable not set")
+            self.client = _get_client(self.api_key)
         self.logger = logger or logging.getLogger(__name__)
 
         # Conversation context - stores message history
@@ -47,6 +74,26 @@ class ConversationManager:
         """Get a summary of the conversation for logging/debugging."""
         return f"Conversation has {len(self.conversation_history)} messages"
 
+    def get_conversation_context(self, max_length: int = 224) -> str:
+        """
+        Get recent conversation text, ready to use as a Whisper prompt.
+
+        Cached on the last three messages, so repeated calls while the
+        conversation is unchanged return the same final string.
+
+        Args:
+            max_length (int): Maximum length of the returned text; the
+                default matches Whisper's 224-token prompt window
+
+        Returns:
+            str: Heads of the last few user/assistant messages
+        """
+        key = tuple(
+            (message.get("role", ""), message.get("content", "")[:50])
+            for message in self.conversation_history[-3:]
+        )
+        return _build_context(key, max_length)
+
     def clear_conversation(self, keep_system_prompt: bool = True) -> None:
         """Clear conversation history, optionally keeping the system prompt."""
         if keep_system_prompt and self.conversation_history:
@@ -156,10 +203,12 @@ class ConversationManager:
 
 
 # Factory function for easy instantiation
-def create_conversation_manager(logger=None) -> ConversationManager:
+def create_conversation_manager(
+    logger=None, client: Optional[OpenAI] = None
+) -> ConversationManager:
     """Create a ConversationManager instance with error handling."""
     try:
-        return ConversationManager(logger)
+        return ConversationManager(logger, client)
     except ValueError as e:
         if logger:
             logger.error(f"Failed to create ConversationManager: {e}")
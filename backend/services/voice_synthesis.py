@@ -3,13 +3,16 @@ import os
 import io
 import wave
 import base64
-import struct  # Add this import
 from flask import current_app  # For logging
 import socket  # For catching socket.gaierror and direct getaddrinfo test
 from urllib.parse import urlparse  # For extracting hostname from URL
 import logging  # For standalone __main__ testing
-from typing import Generator
+from typing import Generator, Optional
 import math
+import threading
+
+import numpy as np
+from scipy.signal import lfilter
 
 # Basic logging config for when __main__ is run, Flask will have its own config
 if __name__ == "__main__":
@@ -28,6 +31,9 @@ if __name__ == "__main__":
         def debug(self, msg):
             logging.debug(f"(MockFlaskLogger) {msg}")
 
+        def isEnabledFor(self, level):
+            return logging.getLogger().isEnabledFor(level)
+
     try:
         current_app.logger
     except RuntimeError:
@@ -38,6 +44,44 @@ if __name__ == "__main__":
         current_app = MockCurrentApp()
 
 
+_CARTESIA_CLIENT: Optional[Cartesia] = None
+_CARTESIA_CLIENT_LOCK = threading.Lock()
+
+
+def _get_cartesia_client(api_key: str) -> Cartesia:
+    """Return the process-wide Cartesia client, creating it on first use."""
+    global _CARTESIA_CLIENT
+    with _CARTESIA_CLIENT_LOCK:
+        if _CARTESIA_CLIENT is None:
+            _CARTESIA_CLIENT = Cartesia(api_key=api_key)
+        return _CARTESIA_CLIENT
+
+
+def _disable_nagle(ws, logger) -> bool:
+    """
+    Set TCP_NODELAY on the socket underneath a Cartesia WebSocket.
+
+    The SDK does not expose its socket, so probe the attribute names used by
+    the websocket libraries it has shipped with. Returns True if the option
+    was applied.
+    """
+    candidates = [
+        getattr(ws, "_sock", None),
+        getattr(getattr(ws, "ws", None), "sock", None),
+        getattr(getattr(ws, "websocket", None), "sock", None),
+        getattr(getattr(ws, "websocket", None), "socket", None),
+    ]
+    for sock in candidates:
+        if sock is None:
+            continue
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return True
+        except (AttributeError, OSError) as e:
+            logger.debug(f"Could not set TCP_NODELAY on Cartesia socket: {e}")
+    return False
+
+
 def my_processing_function(text):
     current_app.logger.info("--- Checking Proxy Environment Variables ---")
     for proxy_var in ["HTTP_PROXY", "HTTPS_PROXY", "WS_PROXY", "WSS_PROXY", "NO_PROXY"]:
@@ -58,9 +102,7 @@ def my_processing_function(text):
     # Define sample_rate for Cartesia
     sample_rate = 22050  # Sample rate for Cartesia
 
-    client = Cartesia(
-        api_key=os.getenv("CARTESIA_API_KEY"),
-    )
+    client = _get_cartesia_client(api_key)
     response = client.tts.sse(
         model_id="sonic-2",
         transcript="Hello world!",
@@ -137,6 +179,8 @@ def my_processing_function(text):
         current_app.logger.info(
             "Cartesia WebSocket connected successfully via client library."
         )
+        if not _disable_nagle(ws, current_app.logger):
+            current_app.logger.debug("TCP_NODELAY not applied to Cartesia WebSocket")
         current_app.logger.info("Sending TTS request and processing stream...")
 
         for i, output_item in enumerate(
@@ -166,26 +210,26 @@ def my_processing_function(text):
             except Exception as log_e:
                 current_app.logger.debug(f"Could not dir(output_item): {log_e}")
 
-            if hasattr(output_item, "audio") and output_item.audio is not None:
+            audio = getattr(output_item, "audio", None)
+            if audio is not None:
                 current_app.logger.info(
-                    f"Stream item {i}: Received audio chunk of length {len(output_item.audio)}"
+                    f"Stream item {i}: Received audio chunk of length {len(audio)}"
                 )
-                audio_chunks.append(output_item.audio)
+                audio_chunks.append(audio)
             else:
                 current_app.logger.info(
                     f"Stream item {i}: No audio data in this item or audio attribute is None."
                 )
 
-            if hasattr(output_item, "status") and output_item.status is not None:
+            status = getattr(output_item, "status", None)
+            event_type = getattr(output_item, "event_type", None)
+            if status is not None:
                 current_app.logger.info(
-                    f"Stream item {i}: Status present - Code: {getattr(output_item.status, 'code', 'N/A')}, Message: {getattr(output_item.status, 'message', 'N/A')}"
+                    f"Stream item {i}: Status present - Code: {getattr(status, 'code', 'N/A')}, Message: {getattr(status, 'message', 'N/A')}"
                 )
-            elif (
-                hasattr(output_item, "event_type")
-                and output_item.event_type is not None
-            ):
+            elif event_type is not None:
                 current_app.logger.info(
-                    f"Stream item {i}: Event type present - {output_item.event_type}"
+                    f"Stream item {i}: Event type present - {event_type}"
                 )
 
         current_app.logger.info("Finished iterating through ws.send() stream.")
@@ -239,18 +283,15 @@ def my_processing_function(text):
 
     # First pass: analyze audio levels for optimal gain
     current_app.logger.info("🔍 Analyzing audio levels for optimal gain...")
-    all_float_samples = []
-
-    for i in range(num_samples):
-        float_val = struct.unpack_from("<f", full_audio_bytes_f32le, i * 4)[0]
-        all_float_samples.append(abs(float_val))
-
-    if all_float_samples:
-        max_level = max(all_float_samples)
-        avg_level = sum(all_float_samples) / len(all_float_samples)
-        rms_level = (
-            sum(x * x for x in all_float_samples) / len(all_float_samples)
-        ) ** 0.5
+    float_samples = np.frombuffer(
+        full_audio_bytes_f32le, dtype="<f4", count=num_samples
+    ).astype(np.float32)
+
+    if num_samples:
+        max_level = float(np.abs(float_samples).max())
+        rms_level = math.sqrt(
+            float(np.dot(float_samples, float_samples)) / num_samples
+        )
 
         # Calculate optimal gain
         target_peak = 0.8  # Target 80% of max to avoid clipping
@@ -266,16 +307,20 @@ def my_processing_function(text):
                 1.0, min(optimal_gain, 8.0)
             )  # Limit gain between 1x and 8x
 
-            current_app.logger.info("🎚️ Audio Analysis Results:")
-            current_app.logger.info(
-                f"   • Original Peak: {max_level:.4f} ({20 * math.log10(max_level) if max_level > 0 else -100:.1f}dB)"
-            )
-            current_app.logger.info(
-                f"   • Original RMS: {rms_level:.4f} ({20 * math.log10(rms_level) if rms_level > 0 else -100:.1f}dB)"
-            )
-            current_app.logger.info(
-                f"   • Optimal Gain: {optimal_gain:.2f}x ({20 * math.log10(optimal_gain):.1f}dB boost)"
-            )
+            if current_app.logger.isEnabledFor(logging.INFO):
+                peak_db = 20 * math.log10(max_level)
+                rms_db = 20 * math.log10(rms_level) if rms_level > 0 else -100
+                gain_db = 20 * math.log10(optimal_gain)
+                current_app.logger.info("🎚️ Audio Analysis Results:")
+                current_app.logger.info(
+                    f"   • Original Peak: {max_level:.4f} ({peak_db:.1f}dB)"
+                )
+                current_app.logger.info(
+                    f"   • Original RMS: {rms_level:.4f} ({rms_db:.1f}dB)"
+                )
+                current_app.logger.info(
+                    f"   • Optimal Gain: {optimal_gain:.2f}x ({gain_db:.1f}dB boost)"
+                )
         else:
             optimal_gain = 4.0  # Default gain if no signal detected
             current_app.logger.warning(
@@ -287,17 +332,13 @@ def my_processing_function(text):
 
     # Second pass: convert with optimal gain
     current_app.logger.info(f"🎵 Converting audio with {optimal_gain:.2f}x gain...")
-    full_audio_bytes_s16le = bytearray(num_samples * 2)
-
-    for i in range(num_samples):
-        float_val = struct.unpack_from("<f", full_audio_bytes_f32le, i * 4)[0]
 
-        # Apply optimal gain and clipping protection
-        gained_val = float_val * optimal_gain
-        clipped_val = max(-1.0, min(1.0, gained_val))
-        int_val = int(clipped_val * 32767.0)
-
-        struct.pack_into("<h", full_audio_bytes_s16le, i * 2, int_val)
+    # Apply optimal gain, then a saturating vectorized cast to int16
+    scaled = float_samples  # Private copy from astype above, safe to modify
+    np.multiply(scaled, optimal_gain * 32767.0, out=scaled)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -32767.0, 32767.0, out=scaled)
+    full_audio_bytes_s16le = scaled.astype("<i2").tobytes()
 
     current_app.logger.info(
         f"Total concatenated int16 audio bytes: {len(full_audio_bytes_s16le)} (with {optimal_gain:.2f}x gain)."
@@ -347,10 +388,20 @@ def my_processing_function(text):
 
 
 # NEW FUNCTION FOR STREAMING TTS VIA SOCKETIO
-def my_processing_function_streaming(text: str, logger) -> Generator[bytes, None, None]:
+def my_processing_function_streaming(
+    text: str, logger, frame_ms: int = 10
+) -> Generator[memoryview, None, None]:
     """
     Stream TTS audio chunks with online IIR smoothing filter.
     Real-time streaming with gentle audio smoothing.
+
+    frame_ms sets the duration of each yielded frame. Smaller frames reach the
+    caller sooner (the first frame waits for frame_ms of audio), at the cost of
+    more SocketIO emits and per-message overhead for the same audio.
+
+    Frames are yielded as memoryviews over a reused ring buffer, so each one is
+    only valid until the next frame is requested. Callers that keep frames
+    around must copy them with bytes(frame).
     """
     logger.info(f"Starting TTS streaming for text: '{text[:50]}...'")
 
@@ -361,123 +412,118 @@ def my_processing_function_streaming(text: str, logger) -> Generator[bytes, None
             logger.error("CARTESIA_API_KEY not set.")
             raise ValueError("CARTESIA_API_KEY environment variable not set.")
 
-        client = Cartesia(api_key=api_key)
+        client = _get_cartesia_client(api_key)
 
-        # Stream response from Cartesia using SSE
-        response = client.tts.sse(
-            model_id="sonic-english",
-            transcript=text,
-            voice={"mode": "id", "id": "b7d50908-b17c-442d-ad8d-810c63997ed9"},
-            output_format={
-                "container": "raw",
-                "encoding": "pcm_f32le",
-                "sample_rate": 22050,
-            },
-        )
+        # Stream response from Cartesia over WebSocket; output items carry the
+        # raw float32 PCM as bytes so no base64 decoding is needed per chunk
+        ws = client.tts.websocket()
+        ws.connect()
+        if not _disable_nagle(ws, logger):
+            logger.debug("TCP_NODELAY not applied to Cartesia WebSocket")
 
-        logger.info("Successfully connected to Cartesia SSE stream")
+        logger.info("Successfully connected to Cartesia WebSocket stream")
 
         chunk_count = 0
         total_bytes = 0
 
-        # Buffer for accumulating partial frames
-        audio_buffer = bytearray()
-
         # One-pole IIR filter state for online audio smoothing
         # y[n] = a * x[n] + (1-a) * y[n-1]
         filter_alpha = 0.35  # Increased from 0.15 - less smoothing, more clarity
-        filter_state = 0.0  # Previous output sample
+        filter_b = [filter_alpha]
+        filter_a = [1.0, -(1 - filter_alpha)]
+        filter_zi = np.zeros(1)  # lfilter state, (1-a) * previous output sample
         gentle_gain = 2.2  # Increased from 1.8 to compensate for less smoothing
 
-        # Use correct frame size for 20ms frames at 22050Hz
-        FRAME_SIZE_BYTES = 441 * 2  # 882 bytes
+        # Frame size in int16 bytes, e.g. 10ms at 22050Hz = 220 samples = 440 bytes
+        sample_rate = 22050
+        FRAME_SIZE_BYTES = int(sample_rate * frame_ms / 1000) * 2
+
+        # Ring buffer for int16 output: samples are copied straight into it and
+        # frames are handed out as zero-copy views. The capacity is a whole
+        # number of frames so a frame never straddles the wrap point.
+        ring_capacity = FRAME_SIZE_BYTES * 64
+        backing = bytearray(ring_capacity)
+        backing_view = memoryview(backing)
+        ring_samples = np.frombuffer(backing, dtype="<i2")
+        write_off = 0  # Next byte to write
+        read_off = 0  # Start of the next frame to yield
 
         logger.info(
             f"🎵 Starting real-time streaming with IIR smoothing (α={filter_alpha}, gain={gentle_gain}x)..."
         )
 
-        # REAL-TIME STREAMING with IIR smoothing
-        for item in response:
-            if hasattr(item, "type") and item.type == "chunk":
-                if hasattr(item, "data") and isinstance(item.data, str):
-                    try:
-                        # Decode base64 audio data
-                        import base64
-
-                        audio_bytes_f32le = base64.b64decode(item.data)
-
-                        if len(audio_bytes_f32le) > 0:
-                            chunk_count += 1
-                            total_bytes += len(audio_bytes_f32le)
-
-                            # REAL-TIME PROCESSING: Convert with IIR smoothing
-                            num_samples = len(audio_bytes_f32le) // 4
-                            audio_bytes_s16le = bytearray(num_samples * 2)
-
-                            # Process each sample with one-pole IIR filter
-                            for i in range(num_samples):
-                                float_val = struct.unpack_from(
-                                    "<f", audio_bytes_f32le, i * 4
-                                )[0]
-
-                                # Apply gentle gain first
-                                gained_val = float_val * gentle_gain
-
-                                # Apply one-pole IIR smoothing filter
-                                # y[n] = α * x[n] + (1-α) * y[n-1]
-                                filter_state = (
-                                    filter_alpha * gained_val
-                                    + (1 - filter_alpha) * filter_state
-                                )
-
-                                # Soft clipping with gentle saturation
-                                if filter_state > 1.0:
-                                    smoothed_val = 1.0 - math.exp(
-                                        -(filter_state - 1.0)
-                                    )  # Soft clip positive
-                                elif filter_state < -1.0:
-                                    smoothed_val = -1.0 + math.exp(
-                                        -(abs(filter_state) - 1.0)
-                                    )  # Soft clip negative
-                                else:
-                                    smoothed_val = filter_state
-
-                                # Convert to int16
-                                int_val = int(smoothed_val * 32767.0)
-                                int_val = max(
-                                    -32768, min(32767, int_val)
-                                )  # Hard limit for safety
-
-                                struct.pack_into(
-                                    "<h", audio_bytes_s16le, i * 2, int_val
-                                )
-
-                            # Add to buffer
-                            audio_buffer.extend(audio_bytes_s16le)
-
-                            # IMMEDIATE YIELDING: Yield frames as soon as they're ready
-                            while len(audio_buffer) >= FRAME_SIZE_BYTES:
-                                frame = bytes(audio_buffer[:FRAME_SIZE_BYTES])
-                                audio_buffer = audio_buffer[FRAME_SIZE_BYTES:]
-                                yield frame
-
-                    except Exception as decode_error:
-                        logger.error(
-                            f"Error decoding base64 audio data: {decode_error}"
-                        )
-                        continue
-
-            elif hasattr(item, "type") and item.type == "done":
-                logger.info("Received done signal from Cartesia")
-                break
+        try:
+            # REAL-TIME STREAMING with IIR smoothing
+            for output_item in ws.send(
+                model_id="sonic-english",
+                transcript=text,
+                voice={"mode": "id", "id": "b7d50908-b17c-442d-ad8d-810c63997ed9"},
+                stream=True,
+                output_format={
+                    "container": "raw",
+                    "encoding": "pcm_f32le",
+                    "sample_rate": sample_rate,
+                },
+            ):
+                audio_bytes_f32le = output_item.audio
+                if not audio_bytes_f32le:
+                    continue
+
+                chunk_count += 1
+                total_bytes += len(audio_bytes_f32le)
+
+                # REAL-TIME PROCESSING: Convert with IIR smoothing
+                num_samples = len(audio_bytes_f32le) // 4
+                gained = (
+                    np.frombuffer(audio_bytes_f32le, dtype="<f4", count=num_samples)
+                    * gentle_gain
+                )
+
+                # y[n] = α * x[n] + (1-α) * y[n-1], with the state carried
+                # across chunks
+                smoothed, filter_zi = lfilter(filter_b, filter_a, gained, zi=filter_zi)
+
+                # Soft clipping with gentle saturation outside [-1, 1]
+                over = smoothed > 1.0
+                under = smoothed < -1.0
+                smoothed[over] = 1.0 - np.exp(1.0 - smoothed[over])
+                smoothed[under] = -1.0 + np.exp(1.0 + smoothed[under])
+
+                # Convert to int16 with a saturating vectorized cast
+                np.multiply(smoothed, 32767.0, out=smoothed)
+                np.rint(smoothed, out=smoothed)
+                np.clip(smoothed, -32768, 32767, out=smoothed)
+                pcm = smoothed.astype(np.int16)
+
+                sample_index = 0
+                while sample_index < num_samples:
+                    # Never write past the end of the ring in one span
+                    span = min(
+                        num_samples - sample_index, (ring_capacity - write_off) // 2
+                    )
+                    ring_start = write_off // 2
+                    ring_samples[ring_start : ring_start + span] = pcm[
+                        sample_index : sample_index + span
+                    ]
+                    write_off += span * 2
+                    sample_index += span
+
+                    # IMMEDIATE YIELDING: Yield frames as soon as they're ready
+                    while write_off - read_off >= FRAME_SIZE_BYTES:
+                        yield backing_view[read_off : read_off + FRAME_SIZE_BYTES]
+                        read_off += FRAME_SIZE_BYTES
+
+                    if write_off == ring_capacity:
+                        write_off = 0
+                        read_off = 0
+        finally:
+            ws.close()
 
         # Yield any remaining partial frame (pad with silence if needed)
-        if len(audio_buffer) > 0:
-            # Pad with silence to complete the frame
-            remaining_bytes = FRAME_SIZE_BYTES - len(audio_buffer)
-            if remaining_bytes > 0:
-                audio_buffer.extend(b"\x00" * remaining_bytes)
-            yield bytes(audio_buffer)
+        if write_off > read_off:
+            frame_end = read_off + FRAME_SIZE_BYTES
+            backing[write_off:frame_end] = bytes(frame_end - write_off)
+            yield backing_view[read_off:frame_end]
 
         logger.info(
             f"✅ Real-time streaming with IIR smoothing completed: {chunk_count} chunks, {total_bytes} bytes"
@@ -501,7 +547,7 @@ def diagnose_cartesia_audio_quality(text: str, logger) -> dict:
         if not api_key:
             raise ValueError("CARTESIA_API_KEY environment variable not set.")
 
-        client = Cartesia(api_key=api_key)
+        client = _get_cartesia_client(api_key)
 
         # Get response from Cartesia
         response = client.tts.sse(
@@ -520,35 +566,39 @@ def diagnose_cartesia_audio_quality(text: str, logger) -> dict:
         chunk_sizes = []
 
         for item in response:
-            if hasattr(item, "type") and item.type == "chunk":
-                if hasattr(item, "data") and isinstance(item.data, str):
-                    import base64
-
-                    audio_bytes = base64.b64decode(item.data)
-                    if len(audio_bytes) > 0:
-                        raw_chunks.append(audio_bytes)
-                        chunk_sizes.append(len(audio_bytes))
+            item_type = getattr(item, "type", None)
+            data = getattr(item, "data", None)
+            if item_type == "chunk" and isinstance(data, str):
+                audio_bytes = base64.b64decode(data)
+                if len(audio_bytes) > 0:
+                    raw_chunks.append(audio_bytes)
+                    chunk_sizes.append(len(audio_bytes))
+            elif item_type == "done":
+                break
 
         if not raw_chunks:
             return {"error": "No audio chunks received from Cartesia"}
 
-        # Analyze all samples
-        all_samples = []
-        for chunk in raw_chunks:
-            num_samples = len(chunk) // 4
-            for i in range(num_samples):
-                float_val = struct.unpack_from("<f", chunk, i * 4)[0]
-                all_samples.append(float_val)
+        # Analyze all samples as one float32 array (any partial trailing
+        # sample in a chunk is dropped, as before)
+        all_samples = np.concatenate(
+            [
+                np.frombuffer(chunk, dtype="<f4", count=len(chunk) // 4)
+                for chunk in raw_chunks
+            ]
+        )
 
-        if not all_samples:
+        if all_samples.size == 0:
             return {"error": "No audio samples found"}
 
         # Calculate comprehensive statistics
-        abs_samples = [abs(x) for x in all_samples]
-        max_level = max(abs_samples)
-        min_level = min(abs_samples)
-        avg_level = sum(abs_samples) / len(abs_samples)
-        rms_level = (sum(x * x for x in abs_samples) / len(abs_samples)) ** 0.5
+        abs_samples = np.abs(all_samples)
+        max_level = float(abs_samples.max())
+        min_level = float(abs_samples.min())
+        avg_level = float(abs_samples.mean())
+        rms_level = math.sqrt(
+            float(np.dot(all_samples, all_samples)) / all_samples.size
+        )
 
         # Dynamic range analysis
         dynamic_range_db = (
@@ -557,27 +607,31 @@ def diagnose_cartesia_audio_quality(text: str, logger) -> dict:
 
         # Peak analysis
         peak_threshold = max_level * 0.9
-        peaks = [x for x in abs_samples if x >= peak_threshold]
-        peak_percentage = (len(peaks) / len(abs_samples)) * 100
+        peak_count = int(np.count_nonzero(abs_samples >= peak_threshold))
+        peak_percentage = (peak_count / all_samples.size) * 100
 
         # Clipping analysis (values at or near maximum)
         clipping_threshold = 0.99
-        clipped_samples = [x for x in abs_samples if x >= clipping_threshold]
-        clipping_percentage = (len(clipped_samples) / len(abs_samples)) * 100
+        clipped_count = int(np.count_nonzero(abs_samples >= clipping_threshold))
+        clipping_percentage = (clipped_count / all_samples.size) * 100
 
         # Volume distribution analysis
         quiet_threshold = max_level * 0.1
         medium_threshold = max_level * 0.5
         loud_threshold = max_level * 0.8
 
-        quiet_samples = len([x for x in abs_samples if x < quiet_threshold])
-        medium_samples = len(
-            [x for x in abs_samples if quiet_threshold <= x < medium_threshold]
+        quiet_samples = int(np.count_nonzero(abs_samples < quiet_threshold))
+        medium_samples = int(
+            np.count_nonzero(
+                (abs_samples >= quiet_threshold) & (abs_samples < medium_threshold)
+            )
         )
-        loud_samples = len(
-            [x for x in abs_samples if medium_threshold <= x < loud_threshold]
+        loud_samples = int(
+            np.count_nonzero(
+                (abs_samples >= medium_threshold) & (abs_samples < loud_threshold)
+            )
         )
-        very_loud_samples = len([x for x in abs_samples if x >= loud_threshold])
+        very_loud_samples = int(np.count_nonzero(abs_samples >= loud_threshold))
 
         # Calculate optimal gain
         target_peak = 0.8
@@ -590,7 +644,7 @@ def diagnose_cartesia_audio_quality(text: str, logger) -> dict:
         diagnosis = {
             "cartesia_analysis": {
                 "total_chunks": len(raw_chunks),
-                "total_samples": len(all_samples),
+                "total_samples": int(all_samples.size),
                 "chunk_sizes": {
                     "min": min(chunk_sizes),
                     "max": max(chunk_sizes),
@@ -671,6 +725,9 @@ if __name__ == "__main__":
             def debug(self, msg):
                 logging.debug(f"(MockVoiceThingLogger) {msg}")
 
+            def isEnabledFor(self, level):
+                return logging.getLogger().isEnabledFor(level)
+
         class MockCurrentApp:
             logger = MockFlaskLogger()
 
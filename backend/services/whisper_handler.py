@@ -2,13 +2,180 @@
 Whisper voice-to-text integration service for the Voice Agent backend.
 """
 
+import asyncio
+import hashlib
 import os
 import io
-import tempfile
 import logging
-from typing import Optional, Iterator
-from openai import OpenAI
+import queue
+import struct
+import threading
+import time
+import wave
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from math import gcd
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import httpx
+import numpy as np
+import webrtcvad
+from openai import AsyncOpenAI, OpenAI
 from pydub import AudioSegment
+from pydub.utils import mediainfo_json
+from scipy.signal import resample_poly
+
+
+# Whisper prompt conditioning is capped at 224 tokens; a character cap is a
+# cheap stand-in that never exceeds it for ordinary text
+WHISPER_PROMPT_MAX_CHARS = 224
+
+# Utterance segmentation for stream_transcribe
+VAD_AGGRESSIVENESS = 2  # 0 (least) to 3 (most aggressive speech filtering)
+VAD_FRAME_MS = 20  # webrtcvad accepts 10, 20 or 30ms frames
+VAD_SILENCE_MS = 300  # Pause length that ends an utterance
+MAX_SEGMENT_SECONDS = 30  # Whisper's context window
+SEGMENT_OVERLAP_MS = 1000  # Audio repeated across a forced 30s cut
+
+# Compressed input below max_duration_seconds at this rate cannot be overlong,
+# so it skips the duration probe (6 kbps, the lowest Opus/WebM bitrate)
+MIN_COMPRESSED_BYTES_PER_SECOND = 750
+
+# Decoded AudioSegments kept per handler, so validate/info/transcribe of
+# the same recording spawn ffmpeg once
+DECODE_CACHE_SIZE = 4
+
+# Silence detection for has_audio_signal (16-bit sample values)
+SIGNAL_PEAK_THRESHOLD = 200  # Peak in the opening 100ms that counts as signal
+SIGNAL_RMS_THRESHOLD = 100  # Whole-recording RMS below this is silence
+
+# Request grouping for BatchScheduler
+BATCH_MAX_WAIT_MS = 50  # How long a busy scheduler holds a request for others
+BATCH_MAX_SIZE = 8
+
+# Repeated uploads of the same audio (client retries, replays) reuse the
+# earlier transcription instead of calling the API again
+TRANSCRIPTION_CACHE_SIZE = 1024
+TRANSCRIPTION_CACHE_TTL_SECONDS = 3600
+
+# Shared OpenAI client so every handler reuses one pool of keep-alive
+# connections instead of paying client setup and TLS handshakes per session
+_CLIENT: Optional[OpenAI] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _get_client(api_key: str) -> OpenAI:
+    """Return the process-wide OpenAI client, creating it on first use."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = OpenAI(
+                api_key=api_key,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=32, max_connections=64
+                    ),
+                    timeout=30.0,
+                ),
+            )
+        return _CLIENT
+
+
+# Async clients, one per event loop: an async connection pool belongs to the
+# loop that opened it and cannot be used from a later asyncio.run()
+_ASYNC_CLIENTS: Dict[asyncio.AbstractEventLoop, AsyncOpenAI] = {}
+_ASYNC_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_async_client(api_key: str) -> AsyncOpenAI:
+    """Return the running event loop's AsyncOpenAI client, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    with _ASYNC_CLIENTS_LOCK:
+        client = _ASYNC_CLIENTS.get(loop)
+        if client is None:
+            # Forget clients of loops that have since closed
+            for closed_loop in [key for key in _ASYNC_CLIENTS if key.is_closed()]:
+                del _ASYNC_CLIENTS[closed_loop]
+            client = AsyncOpenAI(
+                api_key=api_key,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=32, max_connections=64
+                    ),
+                    timeout=30.0,
+                ),
+            )
+            _ASYNC_CLIENTS[loop] = client
+        return client
+
+
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value: str) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+_TRANSCRIPTION_CACHE = _TTLCache(
+    TRANSCRIPTION_CACHE_SIZE, TRANSCRIPTION_CACHE_TTL_SECONDS
+)
+
+
+def _wav_bytes(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap mono 16-bit PCM in a WAV container (44-byte header + data)."""
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + len(pcm),
+        b"WAVE",
+        b"fmt ",
+        16,  # fmt chunk size
+        1,  # PCM
+        1,  # Mono
+        sample_rate,
+        sample_rate * 2,  # Byte rate
+        2,  # Block align
+        16,  # Bits per sample
+        b"data",
+        len(pcm),
+    )
+    return header + pcm
+
+
+def _drop_repeated_words(previous_text: str, text: str) -> str:
+    """Remove leading words of text that repeat the end of previous_text."""
+    previous_words = [w.strip(".,!?").lower() for w in previous_text.split()]
+    words = text.split()
+    normalized = [w.strip(".,!?").lower() for w in words]
+    for overlap in range(min(len(previous_words), len(words)), 0, -1):
+        if previous_words[-overlap:] == normalized[:overlap]:
+            return " ".join(words[overlap:])
+    return text
 
 
 class WhisperHandler:
@@ -20,7 +187,7 @@ class WhisperHandler:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
 
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = _get_client(self.api_key)
         self.logger = logger or logging.getLogger(__name__)
 
         # Whisper configuration
@@ -31,13 +198,18 @@ class WhisperHandler:
         # Audio processing settings
         self.target_sample_rate = 16000  # Whisper optimal sample rate
         self.max_file_size = 25 * 1024 * 1024  # 25MB limit for Whisper API
+        self.max_duration_seconds = 600  # Bounds preprocessing work per request
         self.supported_formats = ["wav", "mp3", "m4a", "flac", "ogg", "webm"]
 
+        self._decode_cache: "OrderedDict[tuple, AudioSegment]" = OrderedDict()
+        self._decode_cache_lock = threading.Lock()
+
     def transcribe_audio(
         self,
         audio_data: bytes,
         audio_format: str = "wav",
         language: Optional[str] = None,
+        prompt: Optional[str] = None,
     ) -> str:
         """
         Transcribe audio data using OpenAI Whisper.
@@ -46,6 +218,7 @@ class WhisperHandler:
             audio_data: Raw audio bytes
             audio_format: Audio format (wav, mp3, etc.)
             language: Language code (optional, auto-detect if None)
+            prompt: Preceding transcript, up to 224 characters (optional)
 
         Returns:
             Transcribed text string
@@ -54,107 +227,328 @@ class WhisperHandler:
             ValueError: If audio format is unsupported or data is invalid
             Exception: If transcription fails
         """
-        try:
-            self.logger.info(
-                f"Starting transcription of {len(audio_data)} bytes ({audio_format})"
-            )
+        cache_key = self._cache_key(audio_data, audio_format, language, prompt)
+        cached = _TRANSCRIPTION_CACHE.get(cache_key)
+        if cached is not None:
+            self.logger.debug("Transcription cache hit")
+            return cached
+
+        whisper_params = self._prepare_request(
+            audio_data, audio_format, language, prompt
+        )
+
+        # Transcribe using OpenAI Whisper
+        transcript = self.client.audio.transcriptions.create(**whisper_params)
+        transcribed_text = self._extract_text(transcript)
+        _TRANSCRIPTION_CACHE.put(cache_key, transcribed_text)
+        return transcribed_text
+
+    async def transcribe_audio_async(
+        self,
+        audio_data: bytes,
+        audio_format: str = "wav",
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> str:
+        """
+        Transcribe audio data using OpenAI Whisper without blocking the event loop.
 
-            # Validate input
-            if not audio_data:
-                raise ValueError("Empty audio data provided")
+        Preprocessing runs in a worker thread; the API call itself goes through
+        the native async client, so many requests awaited together with
+        asyncio.gather share one thread instead of one thread each.
 
-            if audio_format.lower() not in self.supported_formats:
-                raise ValueError(f"Unsupported audio format: {audio_format}")
+        Args:
+            audio_data: Raw audio bytes
+            audio_format: Audio format (wav, mp3, etc.)
+            language: Language code (optional, auto-detect if None)
+            prompt: Preceding transcript, up to 224 characters (optional)
 
-            if len(audio_data) > self.max_file_size:
-                raise ValueError(
-                    f"Audio file too large: {len(audio_data)} bytes (max: {self.max_file_size})"
-                )
+        Returns:
+            Transcribed text string
 
-            # Process audio if needed
-            processed_audio = self._preprocess_audio(audio_data, audio_format)
+        Raises:
+            ValueError: If audio format is unsupported or data is invalid
+            Exception: If transcription fails
+        """
+        cache_key = self._cache_key(audio_data, audio_format, language, prompt)
+        cached = _TRANSCRIPTION_CACHE.get(cache_key)
+        if cached is not None:
+            self.logger.debug("Transcription cache hit")
+            return cached
+
+        whisper_params = await asyncio.to_thread(
+            self._prepare_request, audio_data, audio_format, language, prompt
+        )
+
+        async_client = _get_async_client(self.api_key)
+        transcript = await async_client.audio.transcriptions.create(**whisper_params)
+        transcribed_text = self._extract_text(transcript)
+        _TRANSCRIPTION_CACHE.put(cache_key, transcribed_text)
+        return transcribed_text
+
+    def _cache_key(
+        self,
+        audio_data: bytes,
+        audio_format: str,
+        language: Optional[str],
+        prompt: Optional[str],
+    ) -> tuple:
+        """Key a transcription on the audio content and request settings."""
+        return (
+            hashlib.blake2b(audio_data, digest_size=16).digest(),
+            audio_format.lower(),
+            self.model,
+            language or self.language,
+            prompt or None,
+        )
+
+    def _prepare_request(
+        self,
+        audio_data: bytes,
+        audio_format: str,
+        language: Optional[str],
+        prompt: Optional[str],
+    ) -> dict:
+        """
+        Validate and preprocess audio into Whisper API request parameters.
 
-            # Create temporary file for Whisper API
-            with tempfile.NamedTemporaryFile(
-                suffix=f".{audio_format}", delete=False
-            ) as temp_file:
-                temp_file.write(processed_audio)
-                temp_file_path = temp_file.name
+        Args:
+            audio_data: Raw audio bytes
+            audio_format: Audio format
+            language: Language code (optional)
+            prompt: Preceding transcript (optional)
 
-            try:
-                # Transcribe using OpenAI Whisper
-                with open(temp_file_path, "rb") as audio_file:
-                    transcript = self.client.audio.transcriptions.create(
-                        model=self.model,
-                        file=audio_file,
-                        language=language or self.language,
-                        response_format=self.response_format,
-                    )
+        Returns:
+            Keyword arguments for audio.transcriptions.create
 
-                # Extract text from response
-                if isinstance(transcript, str):
-                    transcribed_text = transcript
-                else:
-                    transcribed_text = (
-                        transcript.text
-                        if hasattr(transcript, "text")
-                        else str(transcript)
-                    )
+        Raises:
+            ValueError: If audio format is unsupported or data is invalid
+        """
+        self.logger.info(
+            "Starting transcription of %d bytes (%s)", len(audio_data), audio_format
+        )
 
-                self.logger.info(
-                    f"Transcription successful: '{transcribed_text[:100]}...'"
-                )
-                return transcribed_text.strip()
+        # Validate input
+        if not audio_data:
+            raise ValueError("Empty audio data provided")
 
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_file_path)
-                except OSError:
-                    pass
+        if audio_format.lower() not in self.supported_formats:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
 
-        except Exception as e:
-            self.logger.error(f"Transcription failed: {e}", exc_info=True)
-            raise
+        if len(audio_data) > self.max_file_size:
+            raise ValueError(
+                f"Audio file too large: {len(audio_data)} bytes (max: {self.max_file_size})"
+            )
+
+        # Reject overlong audio before decoding it. Compressed audio small
+        # enough to stay under the limit even at the lowest bitrate needs no
+        # probe, which covers ordinary utterances.
+        max_compressed_bytes = (
+            self.max_duration_seconds * MIN_COMPRESSED_BYTES_PER_SECOND
+        )
+        duration = None
+        if audio_format.lower() == "wav" or len(audio_data) > max_compressed_bytes:
+            try:
+                duration = self.get_duration_seconds(audio_data, audio_format)
+            except Exception as e:
+                self.logger.debug("Duration probe failed, continuing: %s", e)
+        if duration is not None and duration > self.max_duration_seconds:
+            raise ValueError(
+                f"Audio too long: {duration:.1f}s (max: {self.max_duration_seconds}s)"
+            )
+
+        # Process audio if needed
+        processed_audio = self._preprocess_audio(audio_data, audio_format)
+
+        # Upload straight from memory; the filename extension tells the API
+        # the format (preprocessing falls back to the original bytes)
+        upload_name = (
+            f"audio.{audio_format.lower()}"
+            if processed_audio is audio_data
+            else "audio.wav"
+        )
+
+        whisper_params = {
+            "model": self.model,
+            "file": (upload_name, processed_audio),
+            "language": language or self.language,
+            "response_format": self.response_format,
+        }
+        if prompt:
+            # Callers keep prompts to the last 224 characters; anything longer
+            # is cut to the last 224 tokens by Whisper itself
+            whisper_params["prompt"] = prompt
+        return whisper_params
+
+    def _extract_text(self, transcript) -> str:
+        """Get the transcribed text from a Whisper API response."""
+        if isinstance(transcript, str):
+            transcribed_text = transcript
+        else:
+            transcribed_text = (
+                transcript.text if hasattr(transcript, "text") else str(transcript)
+            )
+
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "Transcription successful: '%s...'", transcribed_text[:100]
+            )
+        return transcribed_text.strip()
 
     def transcribe_audio_chunks(
-        self, audio_chunks: Iterator[bytes], audio_format: str = "wav"
+        self,
+        audio_chunks: Iterator[bytes],
+        audio_format: str = "wav",
+        max_concurrent: int = 5,
     ) -> Iterator[str]:
         """
         Transcribe audio chunks for streaming/real-time processing.
 
+        Chunks are sent to Whisper as they arrive, with up to max_concurrent
+        requests in flight, and results are yielded in the original chunk order.
+
         Args:
             audio_chunks: Iterator of audio byte chunks
             audio_format: Audio format
+            max_concurrent: Maximum number of simultaneous Whisper requests
 
         Yields:
             Transcribed text for each chunk
         """
-        chunk_count = 0
-
-        for chunk in audio_chunks:
-            try:
-                chunk_count += 1
+        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            pending = deque()
+            for chunk_count, chunk in enumerate(audio_chunks, start=1):
                 self.logger.debug(
-                    f"Processing audio chunk {chunk_count}: {len(chunk)} bytes"
+                    "Processing audio chunk %d: %d bytes", chunk_count, len(chunk)
                 )
 
                 if len(chunk) < 1024:  # Skip very small chunks
-                    self.logger.debug(f"Skipping small chunk {chunk_count}")
+                    self.logger.debug("Skipping small chunk %d", chunk_count)
                     continue
 
-                transcription = self.transcribe_audio(chunk, audio_format)
-
-                if transcription:
-                    self.logger.info(
-                        f"Chunk {chunk_count} transcription: '{transcription}'"
+                pending.append(
+                    (
+                        chunk_count,
+                        executor.submit(self.transcribe_audio, chunk, audio_format),
                     )
-                    yield transcription
+                )
 
-            except Exception as e:
-                self.logger.error(f"Error processing chunk {chunk_count}: {e}")
-                # Continue with next chunk instead of failing completely
-                continue
+                # Hand back finished results without waiting for the input to end
+                while pending and pending[0][1].done():
+                    yield from self._collect_chunk_result(*pending.popleft())
+
+            while pending:
+                yield from self._collect_chunk_result(*pending.popleft())
+
+    def _collect_chunk_result(self, chunk_count: int, future: Future) -> Iterator[str]:
+        """Yield a chunk's transcription, logging and skipping failures."""
+        try:
+            transcription = future.result()
+        except Exception as e:
+            self.logger.error(f"Error processing chunk {chunk_count}: {e}")
+            # Continue with next chunk instead of failing completely
+            return
+
+        if transcription:
+            self.logger.info("Chunk %d transcription: '%s'", chunk_count, transcription)
+            yield transcription
+
+    def stream_transcribe(
+        self,
+        pcm_chunks: Iterable[bytes],
+        language: Optional[str] = None,
+        max_concurrent: int = 2,
+    ) -> Iterator[str]:
+        """
+        Transcribe live audio utterance by utterance while it is still arriving.
+
+        Incoming audio is split into utterances with WebRTC VAD. Each utterance
+        is sent to Whisper as soon as the speaker pauses, so only the last one
+        is still being transcribed when the input ends. Utterances longer than
+        Whisper's 30s window are cut, with a short audio overlap so words at
+        the cut are not lost; the repeated words are removed from the output.
+
+        Args:
+            pcm_chunks: Iterable of 16kHz mono 16-bit PCM byte chunks of any size
+            language: Language code (optional, defaults to handler language)
+            max_concurrent: Maximum number of simultaneous Whisper requests
+
+        Yields:
+            Transcribed text for each utterance, in speaking order
+        """
+        vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+        frame_bytes = self.target_sample_rate * VAD_FRAME_MS // 1000 * 2
+        silence_limit = VAD_SILENCE_MS // VAD_FRAME_MS
+        max_segment_bytes = self.target_sample_rate * MAX_SEGMENT_SECONDS * 2
+        overlap_bytes = self.target_sample_rate * SEGMENT_OVERLAP_MS // 1000 * 2
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        pending = deque()
+        segment_numbers = count(1)
+        # Tail of the transcript so far, shared as Whisper prompt context
+        context = {"text": ""}
+
+        def submit(segment: bytes, overlaps_previous: bool) -> None:
+            wav_data = _wav_bytes(segment, self.target_sample_rate)
+            future = executor.submit(
+                self.transcribe_audio, wav_data, "wav", language, context["text"]
+            )
+            pending.append((next(segment_numbers), future, overlaps_previous))
+
+        def collect(segment_number, future, overlaps_previous) -> Iterator[str]:
+            for text in self._collect_chunk_result(segment_number, future):
+                if overlaps_previous:
+                    text = _drop_repeated_words(context["text"], text)
+                if text:
+                    context["text"] = f"{context['text']} {text}".strip()[
+                        -WHISPER_PROMPT_MAX_CHARS:
+                    ]
+                    yield text
+
+        with executor:
+            partial = bytearray()
+            segment = bytearray()
+            silent_frames = 0
+            segment_overlaps = False
+
+            for chunk in pcm_chunks:
+                partial.extend(chunk)
+                usable = len(partial) - len(partial) % frame_bytes
+                frames = bytes(partial[:usable])
+                del partial[:usable]
+
+                for offset in range(0, usable, frame_bytes):
+                    frame = frames[offset : offset + frame_bytes]
+                    if vad.is_speech(frame, self.target_sample_rate):
+                        segment.extend(frame)
+                        silent_frames = 0
+                    elif segment:
+                        # Keep trailing silence so words are not clipped
+                        segment.extend(frame)
+                        silent_frames += 1
+                        if silent_frames >= silence_limit:
+                            submit(bytes(segment), segment_overlaps)
+                            segment.clear()
+                            segment_overlaps = False
+                            silent_frames = 0
+
+                    if len(segment) >= max_segment_bytes:
+                        # Still speaking at Whisper's 30s limit: cut and carry
+                        # the last moment over so the cut word is heard whole
+                        submit(bytes(segment), segment_overlaps)
+                        del segment[:-overlap_bytes]
+                        segment_overlaps = True
+                        silent_frames = 0
+
+                # Hand back finished utterances while audio keeps arriving
+                while pending and pending[0][1].done():
+                    yield from collect(*pending.popleft())
+
+            if len(segment) // frame_bytes > silent_frames:
+                submit(bytes(segment), segment_overlaps)
+
+            while pending:
+                yield from collect(*pending.popleft())
 
     def _preprocess_audio(self, audio_data: bytes, audio_format: str) -> bytes:
         """
@@ -167,29 +561,41 @@ class WhisperHandler:
         Returns:
             Processed audio bytes
         """
+        if audio_format.lower() == "wav" and self._is_whisper_ready_wav(audio_data):
+            self.logger.debug("Audio already Whisper-ready WAV, skipping preprocessing")
+            return audio_data
+
         try:
-            # Load audio using pydub
-            audio = AudioSegment.from_file(io.BytesIO(audio_data), format=audio_format)
+            samples, sample_rate = self._decode_pcm(audio_data, audio_format)
 
             # Convert to optimal format for Whisper
             # - Mono channel
             # - 16kHz sample rate
             # - WAV format
-            if audio.channels > 1:
-                audio = audio.set_channels(1)
+            if samples.shape[1] > 1:
+                samples = samples.mean(axis=1, keepdims=True)
                 self.logger.debug("Converted to mono")
+            samples = samples[:, 0]
+
+            if sample_rate != self.target_sample_rate:
+                # Polyphase resampling with the exact rational ratio
+                divisor = gcd(sample_rate, self.target_sample_rate)
+                samples = resample_poly(
+                    samples,
+                    self.target_sample_rate // divisor,
+                    sample_rate // divisor,
+                )
+                self.logger.debug("Resampled to %dHz", self.target_sample_rate)
 
-            if audio.frame_rate != self.target_sample_rate:
-                audio = audio.set_frame_rate(self.target_sample_rate)
-                self.logger.debug(f"Resampled to {self.target_sample_rate}Hz")
+            pcm = np.clip(np.rint(samples), -32768, 32767).astype("<i2")
 
             # Export as WAV
-            output_buffer = io.BytesIO()
-            audio.export(output_buffer, format="wav")
-            processed_data = output_buffer.getvalue()
+            processed_data = _wav_bytes(pcm.tobytes(), self.target_sample_rate)
 
             self.logger.debug(
-                f"Preprocessed audio: {len(audio_data)} -> {len(processed_data)} bytes"
+                "Preprocessed audio: %d -> %d bytes",
+                len(audio_data),
+                len(processed_data),
             )
             return processed_data
 
@@ -197,22 +603,193 @@ class WhisperHandler:
             self.logger.warning(f"Audio preprocessing failed, using original: {e}")
             return audio_data
 
-    def validate_audio_format(self, audio_data: bytes) -> bool:
+    def _is_whisper_ready_wav(self, audio_data: bytes) -> bool:
+        """Check the RIFF header for 16-bit PCM, mono, at the target sample rate."""
+        if len(audio_data) < 36:
+            return False
+        (
+            riff,
+            _,
+            wave_id,
+            fmt_id,
+            _,
+            format_code,
+            channels,
+            sample_rate,
+            _,
+            _,
+            bits_per_sample,
+        ) = struct.unpack("<4sI4s4sIHHIIHH", audio_data[:36])
+        return (
+            riff == b"RIFF"
+            and wave_id == b"WAVE"
+            and fmt_id == b"fmt "
+            and format_code == 1
+            and channels == 1
+            and sample_rate == self.target_sample_rate
+            and bits_per_sample == 16
+        )
+
+    def _decode_pcm(
+        self, audio_data: bytes, audio_format: str
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Decode audio to 16-bit sample values.
+
+        16-bit PCM WAV is read directly with the wave module; anything else
+        is decoded by pydub (ffmpeg).
+
+        Args:
+            audio_data: Raw audio bytes
+            audio_format: Audio format
+
+        Returns:
+            Tuple of (float32 array shaped (frames, channels), sample rate)
+        """
+        if audio_format.lower() == "wav":
+            try:
+                with wave.open(io.BytesIO(audio_data), "rb") as wav_file:
+                    if wav_file.getsampwidth() == 2:
+                        channels = wav_file.getnchannels()
+                        frames = wav_file.readframes(wav_file.getnframes())
+                        samples = np.frombuffer(frames, dtype="<i2")
+                        return (
+                            samples.reshape(-1, channels).astype(np.float32),
+                            wav_file.getframerate(),
+                        )
+            except (wave.Error, EOFError) as e:
+                self.logger.debug("Direct WAV decode failed, using pydub: %s", e)
+
+        audio = self._get_segment(audio_data, audio_format).set_sample_width(2)
+        samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+        return samples.reshape(-1, audio.channels), audio.frame_rate
+
+    def has_audio_signal(self, audio_data: bytes, audio_format: str) -> bool:
+        """
+        Check whether audio contains anything louder than background silence.
+
+        The opening 100ms is checked for a peak first, so most recordings
+        with speech return without scanning the rest.
+
+        Args:
+            audio_data: Raw audio bytes
+            audio_format: Audio format
+
+        Returns:
+            True if the audio has signal (or cannot be decoded to check)
+        """
+        try:
+            samples, sample_rate = self._decode_pcm(audio_data, audio_format)
+        except Exception as e:
+            # Let transcription report undecodable audio
+            self.logger.debug("Signal check skipped, decode failed: %s", e)
+            return True
+
+        if not samples.size:
+            return False
+
+        opening = samples[: sample_rate // 10]
+        if np.abs(opening).max() >= SIGNAL_PEAK_THRESHOLD:
+            return True
+
+        flat = samples.ravel().astype(np.float64)
+        rms = np.sqrt(np.dot(flat, flat) / flat.size)
+        return bool(rms >= SIGNAL_RMS_THRESHOLD)
+
+    def get_duration_seconds(
+        self, audio_data: bytes, audio_format: str
+    ) -> Optional[float]:
+        """
+        Get the duration of audio data without decoding it.
+
+        PCM WAV duration comes from the header, and audio already decoded
+        (e.g. by validate_audio_format) from the cached segment. Other input
+        is probed with ffprobe, which reads container metadata only.
+
+        Args:
+            audio_data: Raw audio bytes
+            audio_format: Audio format
+
+        Returns:
+            Duration in seconds, or None if the container does not record it
+        """
+        if audio_format.lower() == "wav":
+            try:
+                with wave.open(io.BytesIO(audio_data), "rb") as wav_file:
+                    return wav_file.getnframes() / wav_file.getframerate()
+            except (wave.Error, EOFError):
+                pass
+
+        key = self._segment_key(audio_data, audio_format)
+        with self._decode_cache_lock:
+            audio = self._decode_cache.get(key)
+        if audio is not None:
+            return len(audio) / 1000.0
+
+        info = mediainfo_json(io.BytesIO(audio_data))
+        durations = [info.get("format", {}).get("duration")] + [
+            stream.get("duration") for stream in info.get("streams", [])
+        ]
+        for duration in durations:
+            try:
+                return float(duration)
+            except (TypeError, ValueError):
+                continue
+        return None
+
+    def _segment_key(self, audio_data: bytes, audio_format: Optional[str]) -> tuple:
+        """Key a decoded AudioSegment on the audio content and format."""
+        return (
+            hashlib.blake2b(audio_data, digest_size=16).digest(),
+            audio_format.lower() if audio_format else None,
+        )
+
+    def _get_segment(
+        self, audio_data: bytes, audio_format: Optional[str]
+    ) -> AudioSegment:
+        """
+        Decode audio with pydub, reusing a recent decode of the same bytes.
+
+        Args:
+            audio_data: Raw audio bytes
+            audio_format: Audio format (None lets ffmpeg detect it)
+
+        Returns:
+            Decoded AudioSegment
+        """
+        key = self._segment_key(audio_data, audio_format)
+        with self._decode_cache_lock:
+            if key in self._decode_cache:
+                self._decode_cache.move_to_end(key)
+                return self._decode_cache[key]
+
+        audio = AudioSegment.from_file(io.BytesIO(audio_data), format=audio_format)
+
+        with self._decode_cache_lock:
+            self._decode_cache[key] = audio
+            if len(self._decode_cache) > DECODE_CACHE_SIZE:
+                self._decode_cache.popitem(last=False)
+        return audio
+
+    def validate_audio_format(
+        self, audio_data: bytes, audio_format: Optional[str] = None
+    ) -> bool:
         """
         Validate if audio data is in a supported format.
 
         Args:
             audio_data: Raw audio bytes
+            audio_format: Audio format (optional, detected if None)
 
         Returns:
             True if format is valid and supported
         """
         try:
             # Try to load with pydub to validate format
-            AudioSegment.from_file(io.BytesIO(audio_data))
+            self._get_segment(audio_data, audio_format)
             return True
         except Exception as e:
-            self.logger.debug(f"Audio format validation failed: {e}")
+            self.logger.debug("Audio format validation failed: %s", e)
             return False
 
     def get_audio_info(self, audio_data: bytes, audio_format: str) -> dict:
@@ -227,7 +804,7 @@ class WhisperHandler:
             Dictionary with audio information
         """
         try:
-            audio = AudioSegment.from_file(io.BytesIO(audio_data), format=audio_format)
+            audio = self._get_segment(audio_data, audio_format)
 
             return {
                 "duration_seconds": len(audio) / 1000.0,
@@ -242,6 +819,161 @@ class WhisperHandler:
             return {"error": str(e)}
 
 
+class BatchScheduler:
+    """
+    Groups transcription requests from concurrent voice sessions.
+
+    While earlier transcriptions are still running, a new request is held
+    for up to max_wait_ms so others can join it; an idle scheduler
+    dispatches at once, so a lone caller never waits. Each batch is sent
+    shortest audio first, by byte size so nothing is probed on the
+    scheduler thread, over one bounded pool of API calls. The hosted
+    Whisper API has no batch endpoint; a self-hosted batched model would
+    encode each batch in one pass here.
+    """
+
+    def __init__(
+        self,
+        max_wait_ms: int = BATCH_MAX_WAIT_MS,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_concurrent: int = BATCH_MAX_SIZE,
+    ):
+        """Initialize the scheduler and start its dispatch thread."""
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        # Requests submitted and not yet finished, including queued ones
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="whisper-batch"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="whisper-batch-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        handler: WhisperHandler,
+        audio_data: bytes,
+        audio_format: str = "wav",
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> Future:
+        """
+        Queue audio for transcription by handler.
+
+        Args:
+            handler: WhisperHandler that makes the API call
+            audio_data: Raw audio bytes
+            audio_format: Audio format (wav, mp3, etc.)
+            language: Language code (optional)
+            prompt: Preceding transcript, up to 224 characters (optional)
+
+        Returns:
+            Future resolving to the transcribed text
+        """
+        future = Future()
+        with self._pending_lock:
+            self._pending += 1
+        self._queue.put((handler, audio_data, audio_format, language, prompt, future))
+        return future
+
+    def transcribe_audio(
+        self,
+        handler: WhisperHandler,
+        audio_data: bytes,
+        audio_format: str = "wav",
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> str:
+        """Blocking equivalent of handler.transcribe_audio."""
+        return self.submit(
+            handler, audio_data, audio_format, language, prompt
+        ).result()
+
+    def shutdown(self) -> None:
+        """Dispatch anything still queued and wait for it to finish."""
+        self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _run(self) -> None:
+        """Collect requests into batches until shut down."""
+        running = True
+        while running:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            # Only wait for company while other requests are in flight
+            with self._pending_lock:
+                busy = self._pending > 1
+            deadline = time.monotonic() + (self.max_wait if busy else 0.0)
+
+            batch = [request]
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        request = self._queue.get(timeout=remaining)
+                    else:
+                        request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    running = False
+                    break
+                batch.append(request)
+
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list) -> None:
+        """Start a batch's transcriptions, shortest audio first."""
+        batch.sort(key=lambda request: len(request[1]))
+        for request in batch:
+            self._executor.submit(self._transcribe, *request)
+
+    def _transcribe(
+        self,
+        handler: WhisperHandler,
+        audio_data: bytes,
+        audio_format: str,
+        language: Optional[str],
+        prompt: Optional[str],
+        future: Future,
+    ) -> None:
+        """Run one transcription and resolve its future."""
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(
+                    handler.transcribe_audio(audio_data, audio_format, language, prompt)
+                )
+            except Exception as e:
+                future.set_exception(e)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+
+
+_BATCH_SCHEDULER: Optional[BatchScheduler] = None
+_BATCH_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_batch_scheduler() -> BatchScheduler:
+    """Return the process-wide BatchScheduler, creating it on first use."""
+    global _BATCH_SCHEDULER
+    with _BATCH_SCHEDULER_LOCK:
+        if _BATCH_SCHEDULER is None:
+            _BATCH_SCHEDULER = BatchScheduler()
+        return _BATCH_SCHEDULER
+
+
 # Factory function for easy instantiation
 def create_whisper_handler(logger=None) -> WhisperHandler:
     """Create a WhisperHandler instance with error handling."""
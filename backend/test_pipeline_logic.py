@@ -5,65 +5,99 @@ Tests that both auto-TTS functions emit the correct events.
 """
 import sys
 import os
+import argparse
+import cProfile
+import unittest
 
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from unittest.mock import Mock, patch
 from flask import Flask
-from flask_socketio import SocketIO
+
+from null_logger import NullLogger
+
+# Import the modules under test once; each test reports its group's error
+try:
+    from websocket.conversation_events import (
+        _trigger_auto_tts as conversation_trigger_auto_tts,
+    )
+    CONVERSATION_IMPORT_ERROR = None
+except Exception as e:
+    conversation_trigger_auto_tts = None
+    CONVERSATION_IMPORT_ERROR = e
+
+try:
+    from websocket.voice_events import _trigger_auto_tts as voice_trigger_auto_tts
+    VOICE_IMPORT_ERROR = None
+except Exception as e:
+    voice_trigger_auto_tts = None
+    VOICE_IMPORT_ERROR = e
+
+try:
+    from websocket.tts_events import register_tts_events
+    TTS_IMPORT_ERROR = None
+except Exception as e:
+    TTS_IMPORT_ERROR = e
+
+
+class _EmitRecorder:
+    """Stand-in for emit() that keeps the first data sent for each event name."""
+
+    __slots__ = ("emitted",)
+
+    def __init__(self):
+        self.emitted = {}
+
+    def __call__(self, event, data=None, *args, **kwargs):
+        self.emitted.setdefault(event, data)
+
 
 class PipelineLogicTest:
     def __init__(self):
         self.app = Flask(__name__)
-        self.app.logger = Mock()
-        self.mock_emit = Mock()
+        self.app.logger = NullLogger()
         self.test_results = {}
     
-    def test_conversation_auto_tts(self):
-        """Test that conversation auto-TTS emits start_tts event."""
-        print("🧪 Test 1: Conversation Auto-TTS Logic")
-        
-        # Import the function
-        from websocket.conversation_events import register_conversation_events
-        
-        # Create a mock socketio object
-        mock_socketio = Mock()
-        
-        # Register the events to get the internal function
-        register_conversation_events(mock_socketio, self.app)
+    def _check_auto_tts(self, module_name, trigger_auto_tts, import_error, test_text):
+        """Run a module's _trigger_auto_tts and check it emits start_tts with the text."""
+        # patch() imports the module again, so report a failed import first
+        if import_error is not None:
+            print(f"   ❌ Could not import _trigger_auto_tts: {import_error}")
+            return False
         
-        # Test the auto-TTS trigger logic directly
-        with patch('websocket.conversation_events.emit') as mock_emit:
-            # Import the internal function
+        with patch(f'{module_name}.emit', new=_EmitRecorder()) as recorder:
             try:
-                from websocket.conversation_events import _trigger_auto_tts
-                
-                test_text = "Test conversation auto-TTS"
-                _trigger_auto_tts(test_text, self.app)
-                
-                # Check if start_tts was emitted
-                start_tts_calls = [call for call in mock_emit.call_args_list 
-                                 if call[0][0] == 'start_tts']
-                
-                if start_tts_calls:
-                    call_data = start_tts_calls[0][0][1]  # Get the data parameter
-                    text_matches = call_data.get('text') == test_text
-                    
-                    print(f"   📊 start_tts emitted: ✅")
-                    print(f"   📊 Text matches: {'✅' if text_matches else '❌'}")
-                    print(f"   📊 Call data: {call_data}")
-                    
-                    success = text_matches
-                else:
-                    print(f"   📊 start_tts emitted: ❌")
-                    print(f"   📊 All calls: {[call[0][0] for call in mock_emit.call_args_list]}")
-                    success = False
-                
+                trigger_auto_tts(test_text, self.app)
             except ImportError as e:
                 print(f"   ❌ Could not import _trigger_auto_tts: {e}")
-                success = False
+                return False
+        
+        # Check if start_tts was emitted
+        if 'start_tts' not in recorder.emitted:
+            print(f"   📊 start_tts emitted: ❌")
+            print(f"   📊 All calls: {list(recorder.emitted)}")
+            return False
         
+        call_data = recorder.emitted['start_tts']
+        text_matches = call_data.get('text') == test_text
+        
+        print(f"   📊 start_tts emitted: ✅")
+        print(f"   📊 Text matches: {'✅' if text_matches else '❌'}")
+        print(f"   📊 Call data: {call_data}")
+        
+        return text_matches
+    
+    def test_conversation_auto_tts(self):
+        """Test that conversation auto-TTS emits start_tts event."""
+        print("🧪 Test 1: Conversation Auto-TTS Logic")
+        
+        success = self._check_auto_tts(
+            'websocket.conversation_events',
+            conversation_trigger_auto_tts,
+            CONVERSATION_IMPORT_ERROR,
+            "Test conversation auto-TTS",
+        )
         self.test_results['conversation_auto_tts'] = success
         
         if success:
@@ -77,35 +111,12 @@ class PipelineLogicTest:
         """Test that voice auto-TTS emits start_tts event."""
         print("\n🧪 Test 2: Voice Auto-TTS Logic")
         
-        with patch('websocket.voice_events.emit') as mock_emit:
-            try:
-                from websocket.voice_events import _trigger_auto_tts
-                
-                test_text = "Test voice auto-TTS"
-                _trigger_auto_tts(test_text, self.app)
-                
-                # Check if start_tts was emitted
-                start_tts_calls = [call for call in mock_emit.call_args_list 
-                                 if call[0][0] == 'start_tts']
-                
-                if start_tts_calls:
-                    call_data = start_tts_calls[0][0][1]  # Get the data parameter
-                    text_matches = call_data.get('text') == test_text
-                    
-                    print(f"   📊 start_tts emitted: ✅")
-                    print(f"   📊 Text matches: {'✅' if text_matches else '❌'}")
-                    print(f"   📊 Call data: {call_data}")
-                    
-                    success = text_matches
-                else:
-                    print(f"   📊 start_tts emitted: ❌")
-                    print(f"   📊 All calls: {[call[0][0] for call in mock_emit.call_args_list]}")
-                    success = False
-                
-            except ImportError as e:
-                print(f"   ❌ Could not import _trigger_auto_tts: {e}")
-                success = False
-        
+        success = self._check_auto_tts(
+            'websocket.voice_events',
+            voice_trigger_auto_tts,
+            VOICE_IMPORT_ERROR,
+            "Test voice auto-TTS",
+        )
         self.test_results['voice_auto_tts'] = success
         
         if success:
@@ -120,18 +131,22 @@ class PipelineLogicTest:
         print("\n🧪 Test 3: TTS Event Handlers")
         
         try:
-            from websocket.tts_events import register_tts_events
+            if TTS_IMPORT_ERROR is not None:
+                raise TTS_IMPORT_ERROR
+            
+            # Record the event name of every socketio.on() registration
+            registered_events = []
+            
+            def record_on(event_name, *args, **kwargs):
+                registered_events.append(event_name)
+                return lambda handler: handler
             
             mock_socketio = Mock()
+            mock_socketio.on.side_effect = record_on
             register_tts_events(mock_socketio, self.app)
             
             # Check that socketio.on was called for the expected events
             expected_events = ['start_tts', 'synthesize_speech_streaming', 'stop_tts']
-            registered_events = []
-            
-            for call in mock_socketio.on.call_args_list:
-                event_name = call[0][0]  # First argument to .on() is the event name
-                registered_events.append(event_name)
             
             print(f"   📊 Registered events: {registered_events}")
             
@@ -208,9 +223,50 @@ class PipelineLogicTest:
         
         return unified_success
 
+
+class TestPipelineLogic(unittest.TestCase):
+    """Run the same checks as test cases, e.g. python -m unittest test_pipeline_logic.
+
+    pytest collects these too, so they can be spread over workers with
+    pytest-xdist where it is installed.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # One Flask app shared by all cases
+        cls.tester = PipelineLogicTest()
+
+    def test_conversation_auto_tts(self):
+        self.assertTrue(self.tester.test_conversation_auto_tts())
+
+    def test_voice_auto_tts(self):
+        self.assertTrue(self.tester.test_voice_auto_tts())
+
+    def test_tts_event_handlers(self):
+        self.assertTrue(self.tester.test_tts_event_handlers())
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline logic tests.")
+    parser.add_argument(
+        "--profile",
+        metavar="OUT.pstats",
+        help="write a cProfile dump of the run to this file",
+    )
+    args = parser.parse_args()
+
     tester = PipelineLogicTest()
-    return tester.run_all_tests()
+    if not args.profile:
+        return tester.run_all_tests()
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return tester.run_all_tests()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"📈 Profile written to {args.profile}")
 
 if __name__ == "__main__":
     success = main()
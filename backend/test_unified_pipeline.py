@@ -8,6 +8,8 @@ import time
 import threading
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -18,6 +20,27 @@ class UnifiedPipelineTest:
         self.events_received = []
         self.test_results = {}
         self.lock = threading.Lock()
+        # One keep-alive session for all HTTP probes, so only the first
+        # request to the server pays for the TCP handshake
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        # Readiness probe results as name -> (ok, status code), filled by
+        # connect() and reused by test_server_endpoints
+        self._endpoints_ok = {}
+    
+    def _probe_endpoint(self, name):
+        """Probe one readiness endpoint once and cache (ok, status code).
+        
+        The main page only needs a HEAD. Engine.IO answers HEAD with 405,
+        so the Socket.IO polling endpoint still gets a GET.
+        """
+        if name not in self._endpoints_ok:
+            if name == 'main':
+                response = self._session.head('http://localhost:8000/', timeout=2)
+            else:
+                response = self._session.get('http://localhost:8000/socket.io/?transport=polling&EIO=4', timeout=2)
+            self._endpoints_ok[name] = (response.status_code == 200, response.status_code)
+        return self._endpoints_ok[name]
         
     def connect(self):
         """Connect to the server using a simpler approach."""
@@ -25,15 +48,15 @@ class UnifiedPipelineTest:
             print("🔌 Connecting to server...")
             
             # First check if server is accessible via HTTP
-            response = requests.get('http://localhost:8000', timeout=5)
-            if response.status_code != 200:
-                print(f"❌ HTTP server not ready: {response.status_code}")
+            main_ok, main_status = self._probe_endpoint('main')
+            if not main_ok:
+                print(f"❌ HTTP server not ready: {main_status}")
                 return False
             
             # Check SocketIO endpoint
-            socketio_response = requests.get('http://localhost:8000/socket.io/?transport=polling&EIO=4', timeout=5)
-            if socketio_response.status_code != 200:
-                print(f"❌ SocketIO endpoint not ready: {socketio_response.status_code}")
+            socketio_ok, socketio_status = self._probe_endpoint('socketio')
+            if not socketio_ok:
+                print(f"❌ SocketIO endpoint not ready: {socketio_status}")
                 return False
             
             print("✅ Server endpoints accessible")
@@ -49,19 +72,17 @@ class UnifiedPipelineTest:
         print("\n🧪 Test 1: Server Endpoints")
         
         try:
-            # Test main endpoint
-            response = requests.get('http://localhost:8000', timeout=5)
-            main_ok = response.status_code == 200
-            print(f"   📊 Main endpoint: {'✅' if main_ok else '❌'} ({response.status_code})")
+            # Test main endpoint (cached from connect())
+            main_ok, main_status = self._probe_endpoint('main')
+            print(f"   📊 Main endpoint: {'✅' if main_ok else '❌'} ({main_status})")
             
-            # Test SocketIO endpoint
-            socketio_response = requests.get('http://localhost:8000/socket.io/?transport=polling&EIO=4', timeout=5)
-            socketio_ok = socketio_response.status_code == 200
-            print(f"   📊 SocketIO endpoint: {'✅' if socketio_ok else '❌'} ({socketio_response.status_code})")
+            # Test SocketIO endpoint (cached from connect())
+            socketio_ok, socketio_status = self._probe_endpoint('socketio')
+            print(f"   📊 SocketIO endpoint: {'✅' if socketio_ok else '❌'} ({socketio_status})")
             
             # Test static files (if any)
             try:
-                static_response = requests.get('http://localhost:8000/test', timeout=5)
+                static_response = self._session.get('http://localhost:8000/test', timeout=5)
                 static_ok = static_response.status_code in [200, 404]  # 404 is fine if no test page
                 print(f"   📊 Static endpoints: {'✅' if static_ok else '❌'} ({static_response.status_code})")
             except:
@@ -116,22 +137,31 @@ class UnifiedPipelineTest:
         
         return success
     
-    def test_server_responsiveness(self):
+    def _timed_get(self, url):
+        """GET url on the shared session; returns (status code, elapsed ms)."""
+        start_ns = time.perf_counter_ns()
+        response = self._session.get(url, timeout=5)
+        return response.status_code, (time.perf_counter_ns() - start_ns) / 1e6
+    
+    def test_server_responsiveness(self, requests_count=3):
         """Test server response times and stability."""
         print("\n🧪 Test 3: Server Responsiveness")
         
         try:
             response_times = []
             
-            for i in range(3):
-                start_time = time.time()
-                response = requests.get('http://localhost:8000', timeout=5)
-                end_time = time.time()
-                
-                response_time = (end_time - start_time) * 1000  # Convert to ms
-                response_times.append(response_time)
-                
-                print(f"   📊 Request {i+1}: {response_time:.1f}ms (status: {response.status_code})")
+            # Fire the probes concurrently over the pooled keep-alive
+            # connections, so the timings reflect the server, not setup
+            with ThreadPoolExecutor(max_workers=requests_count) as pool:
+                futures = {
+                    pool.submit(self._timed_get, 'http://localhost:8000'): i
+                    for i in range(requests_count)
+                }
+                for future in as_completed(futures):
+                    status_code, response_time = future.result()
+                    response_times.append(response_time)
+                    
+                    print(f"   📊 Request {futures[future]+1}: {response_time:.1f}ms (status: {status_code})")
             
             avg_response_time = sum(response_times) / len(response_times)
             max_response_time = max(response_times)
@@ -4,34 +4,98 @@ Audio timing debug script to identify bottlenecks in the audio streaming pipelin
 Instruments each stage: capture, send, receive, decode, playback timing.
 """
 
+import socket
 import socketio
+import threading
 import time
 import sys
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Optional: Socket.IO keeps its stdlib json parser without it
+    orjson = None
+
+# Options for the websocket transport's socket: no Nagle delay on small
+# audio frames, and 64 KiB kernel buffers so data does not pile up far
+# ahead of the reader
+WEBSOCKET_OPTIONS = {
+    "sockopt": (
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_RCVBUF, 64 * 1024),
+        (socket.SOL_SOCKET, socket.SO_SNDBUF, 64 * 1024),
+    )
+}
+
+
+class OrjsonWrapper:
+    """The json-module interface python-socketio uses, backed by orjson."""
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+
+# Extra Socket.IO client options: parse packets with orjson when available
+CLIENT_OPTIONS = {"json": OrjsonWrapper} if orjson is not None else {}
+
+# How long to wait for each test's stream to complete
+TEST_TIMEOUT_SECONDS = 30
+
+# Small integer ids for the event types, so the log can be kept in flat
+# NumPy arrays; types not listed here are assigned the next free id
+EVENT_TYPE_IDS = {
+    "websocket_connect_start": 0,
+    "websocket_connected": 1,
+    "websocket_disconnected": 2,
+    "tts_request_sent": 3,
+    "tts_request_transmitted": 4,
+    "tts_synthesis_started": 5,
+    "audio_chunk_received": 6,
+    "tts_synthesis_completed": 7,
+    "tts_error": 8,
+    "receive_error": 9,
+}
+AUDIO_CHUNK_ID = EVENT_TYPE_IDS["audio_chunk_received"]
+REQUEST_SENT_ID = EVENT_TYPE_IDS["tts_request_sent"]
+
 
 class AudioTimingDebugger:
-    def __init__(self):
-        self.events_log = []
-        self.chunk_timing = {}
-        self.start_time = time.time()
+    def __init__(self, capacity=16384):
+        # Event log as parallel arrays: relative time in ns, event type id
+        # and payload size (0 when there is none); grown if a run fills them
+        self._t = np.empty(capacity, dtype=np.int64)
+        self._etype = np.empty(capacity, dtype=np.uint8)
+        self._size = np.empty(capacity, dtype=np.int32)
+        self._count = 0
+        # Monotonic integer nanoseconds; converted to ms/s only for display
+        self.start_time = time.perf_counter_ns()
+
+    @property
+    def elapsed_ns(self):
+        """Relative time of the last logged event, in ns."""
+        return int(self._t[self._count - 1]) if self._count else 0
 
     def log_event(self, event_type, chunk_id=None, data_size=None, extra_info=None):
-        timestamp = time.time()
-        relative_time = timestamp - self.start_time
-
-        event = {
-            "timestamp": timestamp,
-            "relative_time_ms": round(relative_time * 1000, 2),
-            "event_type": event_type,
-            "chunk_id": chunk_id,
-            "data_size": data_size,
-            "extra_info": extra_info,
-        }
-
-        self.events_log.append(event)
+        relative_time_ns = time.perf_counter_ns() - self.start_time
+
+        n = self._count
+        if n == self._t.size:
+            self._t = np.resize(self._t, n * 2)
+            self._etype = np.resize(self._etype, n * 2)
+            self._size = np.resize(self._size, n * 2)
+        self._t[n] = relative_time_ns
+        self._etype[n] = EVENT_TYPE_IDS.setdefault(event_type, len(EVENT_TYPE_IDS))
+        self._size[n] = data_size or 0
+        self._count = n + 1
 
         # Log to console with timing
-        timing_str = f"[{relative_time:.3f}s]"
+        timing_str = f"[{relative_time_ns / 1e9:.3f}s]"
         if chunk_id:
             print(f"{timing_str} {event_type} - Chunk {chunk_id} ({data_size} bytes)")
         else:
@@ -42,35 +106,56 @@ class AudioTimingDebugger:
         print("🔍 AUDIO TIMING ANALYSIS")
         print("=" * 80)
 
-        # Group events by type
-        event_types = {}
-        for event in self.events_log:
-            event_type = event["event_type"]
-            if event_type not in event_types:
-                event_types[event_type] = []
-            event_types[event_type].append(event)
-
-        # Analyze chunk timing
-        audio_chunks = [
-            e for e in self.events_log if e["event_type"] == "audio_chunk_received"
-        ]
+        n = self._count
+        etype = self._etype[:n]
+        mask = etype == AUDIO_CHUNK_ID
+        chunk_times = self._t[:n][mask]
+        chunk_sizes = self._size[:n][mask]
+        total_chunks = int(chunk_times.size)
+
+        # Which request each chunk answers (1-based; 0 = before any request),
+        # and whether it is the first chunk of that request's stream
+        request_times = self._t[:n][etype == REQUEST_SENT_ID]
+        chunk_requests = np.cumsum(etype == REQUEST_SENT_ID)[mask]
+        first_chunk = np.ones(total_chunks, dtype=bool)
+        first_chunk[1:] = chunk_requests[1:] != chunk_requests[:-1]
+
+        # Time to first audio: request sent -> first chunk of its stream
+        answered = first_chunk & (chunk_requests > 0)
+        ttfa = (
+            chunk_times[answered] - request_times[chunk_requests[answered] - 1]
+        ) / 1e6
+        avg_ttfa = float(ttfa.mean()) if ttfa.size else 0
+        if ttfa.size:
+            print("\n⚡ TIME TO FIRST AUDIO:")
+            print(
+                "\n".join(
+                    f"  Request {i}: {value:.1f}ms"
+                    for i, value in zip(chunk_requests[answered], ttfa)
+                )
+            )
+            print(f"  Average: {avg_ttfa:.1f}ms")
+
+        # Inter-chunk gaps within each stream; the gap into a stream's
+        # first chunk spans the pause between tests and is left out
+        diffs = np.diff(chunk_times)[~first_chunk[1:]]
 
-        if len(audio_chunks) > 1:
-            print(f"\n📊 CHUNK TIMING ANALYSIS ({len(audio_chunks)} chunks)")
+        avg_interval = 0
+        problematic = 0
+        if diffs.size:
+            print(f"\n📊 CHUNK TIMING ANALYSIS ({total_chunks} chunks)")
             print("-" * 50)
 
-            intervals = []
-            for i in range(1, len(audio_chunks)):
-                interval = (
-                    audio_chunks[i]["relative_time_ms"]
-                    - audio_chunks[i - 1]["relative_time_ms"]
+            print(
+                "\n".join(
+                    f"Chunk {i}: {gap:.1f}ms gap"
+                    for i, gap in enumerate(diffs / 1e6, start=1)
                 )
-                intervals.append(interval)
-                print(f"Chunk {i}: {interval:.1f}ms gap")
+            )
 
-            avg_interval = sum(intervals) / len(intervals)
-            min_interval = min(intervals)
-            max_interval = max(intervals)
+            avg_interval = float(diffs.mean()) / 1e6
+            min_interval = int(diffs.min()) / 1e6
+            max_interval = int(diffs.max()) / 1e6
 
             print("\n📈 INTERVAL STATISTICS:")
             print(f"  Average: {avg_interval:.1f}ms")
@@ -79,24 +164,26 @@ class AudioTimingDebugger:
             print(f"  Variation: {max_interval - min_interval:.1f}ms")
 
             # Identify problematic gaps
-            problematic = [i for i in intervals if i > 100]  # >100ms gaps
+            problematic = int(np.count_nonzero(diffs > 100_000_000))  # >100ms gaps
             if problematic:
-                print(f"  ⚠️ Problematic gaps (>100ms): {len(problematic)}")
+                print(f"  ⚠️ Problematic gaps (>100ms): {problematic}")
 
         # Analyze data sizes
-        chunk_sizes = [e["data_size"] for e in audio_chunks if e["data_size"]]
-        if chunk_sizes:
+        chunk_sizes = chunk_sizes[chunk_sizes > 0]
+        chunk_size_avg = float(chunk_sizes.mean()) if chunk_sizes.size else 0
+        if chunk_sizes.size:
             print("\n📦 CHUNK SIZE ANALYSIS:")
-            print(f"  Average size: {sum(chunk_sizes) / len(chunk_sizes):.0f} bytes")
-            print(f"  Min size: {min(chunk_sizes)} bytes")
-            print(f"  Max size: {max(chunk_sizes)} bytes")
-            print(f"  Total data: {sum(chunk_sizes)} bytes")
+            print(f"  Average size: {chunk_size_avg:.0f} bytes")
+            print(f"  Min size: {chunk_sizes.min()} bytes")
+            print(f"  Max size: {chunk_sizes.max()} bytes")
+            print(f"  Total data: {chunk_sizes.sum(dtype=np.int64)} bytes")
 
         return {
-            "total_chunks": len(audio_chunks),
-            "avg_interval": avg_interval if len(audio_chunks) > 1 else 0,
-            "chunk_size_avg": sum(chunk_sizes) / len(chunk_sizes) if chunk_sizes else 0,
-            "problematic_gaps": len(problematic) if len(audio_chunks) > 1 else 0,
+            "total_chunks": total_chunks,
+            "avg_interval": avg_interval,
+            "chunk_size_avg": chunk_size_avg,
+            "avg_ttfa": avg_ttfa,
+            "problematic_gaps": problematic,
         }
 
 
@@ -108,7 +195,57 @@ def test_audio_timing():
     print("🎵 Testing Audio Streaming Timing")
     print("=" * 60)
 
-    sio = socketio.SimpleClient()
+    # Event-driven client; every handler is registered before connect() so
+    # no early event can arrive ahead of its handler
+    sio = socketio.Client(websocket_extra_options=WEBSOCKET_OPTIONS, **CLIENT_OPTIONS)
+
+    chunk_count = 0
+    # Set when the current test's stream finishes or fails
+    done = threading.Event()
+
+    def on_tts_started(data):
+        debugger.log_event("tts_synthesis_started", extra_info=data)
+
+    def on_audio_chunk(data):
+        nonlocal chunk_count
+        chunk_count += 1
+        # The payload is the raw PCM itself (a binary frame, or a list of
+        # byte values); the older dict form with a base64 copy is still
+        # accepted
+        if isinstance(data, dict):
+            chunk_number = data.get("chunk_number")
+            data = data.get("audio_chunk", [])
+        else:
+            chunk_number = chunk_count
+
+        debugger.log_event(
+            "audio_chunk_received",
+            chunk_id=chunk_count,
+            data_size=len(data),
+            extra_info={"chunk_number": chunk_number},
+        )
+
+    def on_tts_completed(data):
+        debugger.log_event(
+            "tts_synthesis_completed", extra_info=f"Total chunks: {chunk_count}"
+        )
+        done.set()
+
+    def on_tts_error(data):
+        debugger.log_event("tts_error", extra_info=data)
+        done.set()
+
+    # Current server event names, plus the older ones this script used
+    for event_name, handler in (
+        ("tts_started", on_tts_started),
+        ("tts_starting", on_tts_started),
+        ("pcm_frame", on_audio_chunk),
+        ("audio_chunk", on_audio_chunk),
+        ("tts_completed", on_tts_completed),
+        ("tts_finished", on_tts_completed),
+        ("tts_error", on_tts_error),
+    ):
+        sio.on(event_name, handler)
 
     try:
         # Connect
@@ -118,58 +255,6 @@ def test_audio_timing():
 
         time.sleep(0.1)
 
-        chunk_count = 0
-
-        def track_audio_timing():
-            nonlocal chunk_count
-            try:
-                while True:
-                    receive_start = time.time()
-                    events = sio.receive(timeout=0.5)
-
-                    if events:
-                        receive_time = (time.time() - receive_start) * 1000
-                        event_name, data = events[0], events[1]
-
-                        if event_name == "tts_starting":
-                            debugger.log_event(
-                                "tts_synthesis_started",
-                                extra_info=data.get("text", "")[:30],
-                            )
-
-                        elif event_name == "audio_chunk":
-                            chunk_count += 1
-                            audio_data = data.get("audio_chunk", [])
-                            chunk_data_b64 = data.get("chunk_data", "")
-
-                            debugger.log_event(
-                                "audio_chunk_received",
-                                chunk_id=chunk_count,
-                                data_size=len(audio_data),
-                                extra_info={
-                                    "receive_time_ms": round(receive_time, 2),
-                                    "base64_size": len(chunk_data_b64),
-                                    "chunk_number": data.get("chunk_number"),
-                                },
-                            )
-
-                        elif event_name == "tts_finished":
-                            debugger.log_event(
-                                "tts_synthesis_completed",
-                                extra_info=f"Total chunks: {data.get('total_chunks', 0)}",
-                            )
-                            break
-
-                        elif event_name == "tts_error":
-                            debugger.log_event(
-                                "tts_error", extra_info=data.get("error")
-                            )
-                            break
-
-            except Exception as e:
-                if "timeout" not in str(e).lower():
-                    debugger.log_event("receive_error", extra_info=str(e))
-
         # Test different text lengths to see chunk behavior
         test_texts = [
             "Short test",
@@ -185,18 +270,24 @@ def test_audio_timing():
                 "tts_request_sent", extra_info=f"Text length: {len(text)}"
             )
 
+            # Track this test
+            chunk_count = 0
+            done.clear()
+
             # Send TTS request
-            send_start = time.time()
-            sio.emit("synthesize_speech_streaming", {"text": text})
-            send_time = (time.time() - send_start) * 1000
+            send_start = time.perf_counter_ns()
+            sio.emit("start_tts", {"text": text})
+            send_time = (time.perf_counter_ns() - send_start) / 1e6
 
             debugger.log_event(
                 "tts_request_transmitted", extra_info=f"Send time: {send_time:.2f}ms"
             )
 
-            # Track this test
-            chunk_count = 0
-            track_audio_timing()
+            if not done.wait(timeout=TEST_TIMEOUT_SECONDS):
+                debugger.log_event(
+                    "receive_error",
+                    extra_info=f"No completion within {TEST_TIMEOUT_SECONDS}s",
+                )
 
             # Brief pause between tests
             time.sleep(1)
@@ -215,6 +306,10 @@ def test_audio_timing():
             print("❌ High average interval between chunks (>100ms)")
             print("   → Consider reducing chunk size or implementing jitter buffer")
 
+        if analysis["avg_ttfa"] > 200:
+            print("❌ Slow time to first audio (>200ms)")
+            print("   → The first frame is held back; emit it as soon as it is synthesized")
+
         if analysis["problematic_gaps"] > 0:
             print(f"❌ {analysis['problematic_gaps']} problematic gaps detected")
             print("   → Network latency or backend processing delays")
@@ -227,7 +322,7 @@ def test_audio_timing():
             print("   → Consider larger chunks to reduce overhead")
 
         if analysis["total_chunks"] > 0:
-            total_time = debugger.events_log[-1]["relative_time_ms"]
+            total_time = debugger.elapsed_ns / 1e6
             throughput = (analysis["chunk_size_avg"] * analysis["total_chunks"]) / (
                 total_time / 1000
             )
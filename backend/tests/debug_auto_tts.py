@@ -1,19 +1,44 @@
 #!/usr/bin/env python3
 import socketio
+import threading
+
+sio = socketio.Client()
+
+# Set on the terminal event of the auto-TTS stream
+done = threading.Event()
+frames = 0
+
+
+@sio.on("pcm_frame")
+def on_pcm_frame(data):
+    global frames
+    frames += 1
+
+
+@sio.on("tts_completed")
+def on_tts_completed(data):
+    print(f"tts_completed: {data} ({frames} pcm frames)")
+    done.set()
+
+
+@sio.on("tts_error")
+def on_tts_error(data):
+    print(f"tts_error: {data}")
+    done.set()
+
+
+@sio.on("*")
+def on_other_event(event, data):
+    print(f"{event}: {data}")
+
 
-sio = socketio.SimpleClient()
 sio.connect("http://localhost:8000")
 
 print("Testing AI conversation with auto-TTS...")
 sio.emit("conversation_text_input", {"text": "Say hello"})
 
 # Listen for events
-for i in range(10):
-    try:
-        events = sio.receive(timeout=2)
-        if events:
-            print(f"{events[0]}: {events[1]}")
-    except:
-        break
+if not done.wait(timeout=20):
+    print("No tts_completed within 20s")
 
 sio.disconnect()
@@ -6,51 +6,142 @@ Runs all streaming tests and provides comprehensive results.
 
 import sys
 import os
+import hashlib
+import json
 import subprocess
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Passing environment and server checks are cached here between runs
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "voice_simple")
+ENVIRONMENT_CACHE_TTL_SECONDS = 24 * 60 * 60
+SERVER_CACHE_TTL_SECONDS = 5
+
+# Keep-alive HTTP session for server checks, created on first use
+_session = None
+
+
+def _read_cache(name, ttl_seconds):
+    """Return the cached JSON value for name, or None if missing or stale."""
+    path = os.path.join(CACHE_DIR, name)
+    try:
+        if os.stat(path).st_mtime <= time.time() - ttl_seconds:
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(name, value):
+    """Cache a JSON value under name; failures to write are ignored."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(os.path.join(CACHE_DIR, name), "w") as f:
+            json.dump(value, f)
+    except OSError:
+        pass
+
+
+def _environment_cache_name():
+    """Cache file for the package check, keyed by interpreter and requirements."""
+    requirements = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "requirements.txt"
+    )
+    try:
+        requirements_mtime = os.path.getmtime(requirements)
+    except OSError:
+        requirements_mtime = 0
+    key = hashlib.sha1(
+        f"{sys.executable}{sys.version}{requirements_mtime}".encode()
+    ).hexdigest()
+    return f"env-{key}.json"
+
+
+def run_test_script(script_name, description, buffered=False):
+    """Run a test script and return success status.
+
+    With buffered=True the script's output is captured and printed in one
+    block when it exits, so scripts running side by side don't interleave.
+    When stdout is not a terminal (e.g. CI) the output is captured as well,
+    and only shown if the script fails.
+    """
+    lines = [
+        f"\n{'='*60}",
+        f"🚀 Running {description}",
+        f"📄 Script: {script_name}",
+        f"{'='*60}",
+    ]
+    if not buffered:
+        print("\n".join(lines))
+        lines = []
 
-def run_test_script(script_name, description):
-    """Run a test script and return success status."""
-    print(f"\n{'='*60}")
-    print(f"🚀 Running {description}")
-    print(f"📄 Script: {script_name}")
-    print(f"{'='*60}")
-    
     script_path = os.path.join(os.path.dirname(__file__), script_name)
-    
+    quiet = not sys.stdout.isatty()
+    output = tempfile.TemporaryFile() if buffered or quiet else None
+
     try:
         # Run the test script
-        start_time = time.time()
-        result = subprocess.run([sys.executable, script_path], 
-                              capture_output=False, 
-                              text=True)
-        end_time = time.time()
-        
+        start_time = time.perf_counter()
+        result = subprocess.run([sys.executable, script_path],
+                              stdout=output,
+                              stderr=subprocess.STDOUT if output else None)
+        end_time = time.perf_counter()
+
         duration = end_time - start_time
-        
+
+        if output is not None and (result.returncode != 0 or not quiet):
+            output.seek(0)
+            lines.append(output.read().decode(errors="replace"))
+
         if result.returncode == 0:
-            print(f"✅ {description} PASSED (took {duration:.2f}s)")
-            return True
+            lines.append(f"✅ {description} PASSED (took {duration:.2f}s)")
+            success = True
         else:
-            print(f"❌ {description} FAILED (took {duration:.2f}s)")
-            return False
-            
+            lines.append(f"❌ {description} FAILED (took {duration:.2f}s)")
+            success = False
+
     except Exception as e:
-        print(f"❌ Failed to run {script_name}: {e}")
-        return False
+        lines.append(f"❌ Failed to run {script_name}: {e}")
+        success = False
+
+    finally:
+        if output is not None:
+            output.close()
+
+    print("\n".join(lines))
+    return success
 
 
 def check_server_status():
     """Check if the backend server is running."""
     print("🔍 Checking backend server status...")
-    
+
+    # Only a running server is cached, so a rerun right after starting it
+    # probes again instead of reusing a stale failure
+    cached = _read_cache("server.json", SERVER_CACHE_TTL_SECONDS)
+    if cached is not None and cached.get("status") is True:
+        print(f"🔁 Server was up within the last {SERVER_CACHE_TTL_SECONDS}s")
+        return True
+
+    status = _probe_server_status()
+    if status is True:
+        _write_cache("server.json", {"status": True})
+    return status
+
+
+def _probe_server_status():
+    """Request the health endpoint; True/False, or None if it can't be checked."""
+    global _session
     try:
-        import requests
-        response = requests.get("http://localhost:8000/health", timeout=5)
+        if _session is None:
+            import requests
+            _session = requests.Session()
+        response = _session.get("http://localhost:8000/health", timeout=5)
         if response.status_code == 200:
             print("✅ Backend server is running")
             return True
@@ -69,22 +160,30 @@ def check_environment():
     """Check if the environment is properly set up."""
     print("🔧 Checking test environment...")
     
-    # Check for required packages
+    # Check for required packages; a pass is cached for this interpreter
+    # and requirements file, a failure is rechecked on the next run
     required_packages = ['socketio', 'flask', 'flask-socketio']
     missing_packages = []
-    
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
-            print(f"✅ {package} is available")
-        except ImportError:
-            missing_packages.append(package)
-            print(f"❌ {package} is missing")
-    
-    if missing_packages:
-        print(f"\n⚠️  Missing packages: {', '.join(missing_packages)}")
-        print("Install with: pip install " + " ".join(missing_packages))
-        return False
+
+    cache_name = _environment_cache_name()
+    cached = _read_cache(cache_name, ENVIRONMENT_CACHE_TTL_SECONDS)
+    if cached is not None and cached.get("ok"):
+        print(f"✅ {', '.join(required_packages)} available (cached)")
+    else:
+        for package in required_packages:
+            try:
+                __import__(package.replace('-', '_'))
+                print(f"✅ {package} is available")
+            except ImportError:
+                missing_packages.append(package)
+                print(f"❌ {package} is missing")
+
+        if missing_packages:
+            print(f"\n⚠️  Missing packages: {', '.join(missing_packages)}")
+            print("Install with: pip install " + " ".join(missing_packages))
+            return False
+
+        _write_cache(cache_name, {"ok": True})
     
     # Check for environment variables
     env_vars = ['CARTESIA_API_KEY', 'OPENAI_API_KEY']
@@ -140,11 +239,25 @@ def main():
     
     print(f"\n🧪 Running {total} test suite(s)...")
     
-    for script, description in tests:
-        if run_test_script(script, description):
-            passed += 1
-        else:
-            print(f"❌ {description} failed")
+    # The suites are independent, so run them side by side unless asked
+    # not to (SEQUENTIAL_TESTS=1 streams each script's output live)
+    if os.getenv("SEQUENTIAL_TESTS") == "1" or total < 2:
+        for script, description in tests:
+            if run_test_script(script, description):
+                passed += 1
+            else:
+                print(f"❌ {description} failed")
+    else:
+        with ThreadPoolExecutor(max_workers=total) as pool:
+            futures = {
+                pool.submit(run_test_script, script, description, True): description
+                for script, description in tests
+            }
+            for future in as_completed(futures):
+                if future.result():
+                    passed += 1
+                else:
+                    print(f"❌ {futures[future]} failed")
     
     # Final results
     print(f"\n{'='*80}")
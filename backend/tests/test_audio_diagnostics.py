@@ -10,6 +10,15 @@ import wave
 import struct
 import math
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.io import wavfile
+
+try:
+    from numba import njit
+except ImportError:  # Optional: the NumPy scan is used without numba
+    njit = None
 
 # Add backend to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -25,6 +34,62 @@ logging.basicConfig(level=logging.DEBUG, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
 
+def pcm16_to_float(audio_data):
+    """Convert little-endian int16 PCM bytes to float32 samples in [-1, 1).
+
+    A trailing odd byte is ignored.
+    """
+    int_samples = np.frombuffer(
+        memoryview(audio_data)[: len(audio_data) // 2 * 2], dtype="<i2"
+    )
+    return np.multiply(int_samples, np.float32(1 / 32768), dtype=np.float32)
+
+
+def _scan_artifacts_numpy(samples):
+    """Return (oscillations, DC bias, large jumps) with whole-array operations
+
+    An oscillation is a sample above 0.1 in magnitude with a strict sign
+    change on both sides (samples 2 .. n-3); a large jump is a step of more
+    than 0.5 between neighbouring samples.
+    """
+    crossings = samples[:-1] * samples[1:] < 0
+    oscillations = int(
+        np.count_nonzero(
+            crossings[1:-2] & crossings[2:-1] & (np.abs(samples[2:-2]) > 0.1)
+        )
+    )
+    dc_bias = float(samples.mean(dtype=np.float64))
+    large_jumps = int(np.count_nonzero(np.abs(np.diff(samples)) > 0.5))
+    return oscillations, dc_bias, large_jumps
+
+
+def _scan_artifacts_loop(samples):
+    """Same scan as _scan_artifacts_numpy in a single pass (compiled by numba)"""
+    n = len(samples)
+    oscillations = 0
+    total = 0.0
+    large_jumps = 0
+    for i in range(n):
+        total += float(samples[i])
+        if i > 0 and abs(samples[i] - samples[i - 1]) > 0.5:
+            large_jumps += 1
+        if (
+            1 < i < n - 2
+            and samples[i - 1] * samples[i] < 0
+            and samples[i] * samples[i + 1] < 0
+            and abs(samples[i]) > 0.1
+        ):
+            oscillations += 1
+    return oscillations, total / n, large_jumps
+
+
+# The compiled loop makes one pass and allocates no temporary arrays
+if njit is not None:
+    scan_artifacts = njit(cache=True, fastmath=True)(_scan_artifacts_loop)
+else:
+    scan_artifacts = _scan_artifacts_numpy
+
+
 class AudioDiagnostics:
     def __init__(self):
         self.test_text = "Hello world, this is a test of the audio quality system."
@@ -41,23 +106,35 @@ class AudioDiagnostics:
         self.processed_backend_data = []
         self.final_output_data = []
 
+        # Compile the artifact scan up front rather than on first use
+        if njit is not None:
+            scan_artifacts(np.zeros(16, dtype=np.float32))
+
     def run_full_diagnostics(self):
         """Run complete audio pipeline diagnostics"""
         print("🔬 Starting comprehensive audio diagnostics...")
         print("=" * 70)
 
         try:
-            # Phase 1: Test Cartesia raw output quality
-            print("\n📡 Phase 1: Analyzing raw Cartesia output...")
-            self.test_cartesia_quality()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                # Phase 1 is one network-bound Cartesia request that phases
+                # 2-3 don't depend on, so it runs while they do and is
+                # reported once they finish
+                cartesia_analysis = pool.submit(
+                    diagnose_cartesia_audio_quality, self.test_text, logger
+                )
 
-            # Phase 2: Test backend IIR processing
-            print("\n🔧 Phase 2: Testing backend IIR processing...")
-            self.test_backend_processing()
+                # Phase 2: Test backend IIR processing
+                print("\n🔧 Phase 2: Testing backend IIR processing...")
+                self.test_backend_processing()
 
-            # Phase 3: Test conversion artifacts
-            print("\n🔄 Phase 3: Testing format conversion...")
-            self.test_conversion_artifacts()
+                # Phase 3: Test conversion artifacts
+                print("\n🔄 Phase 3: Testing format conversion...")
+                self.test_conversion_artifacts()
+
+                # Phase 1: Test Cartesia raw output quality
+                print("\n📡 Phase 1: Analyzing raw Cartesia output...")
+                self.test_cartesia_quality(cartesia_analysis)
 
             # Phase 4: Analyze potential sources
             print("\n🔍 Phase 4: Analyzing artifact sources...")
@@ -70,13 +147,21 @@ class AudioDiagnostics:
         except Exception as e:
             logger.error(f"Diagnostics failed: {e}", exc_info=True)
 
-    def test_cartesia_quality(self):
-        """Test raw Cartesia output quality"""
+    def test_cartesia_quality(self, pending_analysis=None):
+        """Test raw Cartesia output quality
+
+        Args:
+            pending_analysis: Future for a diagnose_cartesia_audio_quality
+                call already in flight; the request is made here if None.
+        """
         try:
             # Get raw Cartesia analysis
-            self.cartesia_analysis = diagnose_cartesia_audio_quality(
-                self.test_text, logger
-            )
+            if pending_analysis is not None:
+                self.cartesia_analysis = pending_analysis.result()
+            else:
+                self.cartesia_analysis = diagnose_cartesia_audio_quality(
+                    self.test_text, logger
+                )
 
             if "error" in self.cartesia_analysis:
                 print(f"❌ Cartesia analysis failed: {self.cartesia_analysis['error']}")
@@ -116,25 +201,21 @@ class AudioDiagnostics:
 
             # Collect streaming output
             raw_chunks = []
-            iir_chunks = []
+            # Frames are appended in place; the streaming generator's frames
+            # are views into its ring buffer, so they are copied here anyway
+            combined_audio = bytearray()
 
             chunk_count = 0
             for chunk in my_processing_function_streaming(self.test_text, logger):
                 chunk_count += 1
-                iir_chunks.append(chunk)
-
-                if chunk_count % 10 == 0:
-                    print(f"   Processed chunk {chunk_count} ({len(chunk)} bytes)")
+                combined_audio.extend(chunk)
 
-            if not iir_chunks:
+            if not combined_audio:
                 self.artifacts_detected.append(
                     "No chunks received from backend IIR processing"
                 )
                 return
 
-            # Combine all chunks
-            combined_audio = b"".join(iir_chunks)
-
             # Analyze IIR-processed audio
             self.backend_analysis = self.analyze_pcm_audio(
                 combined_audio, "Backend IIR Output"
@@ -143,8 +224,10 @@ class AudioDiagnostics:
             # Check for specific IIR artifacts
             self.check_iir_artifacts(combined_audio)
 
-            # Save for comparison
-            self.save_audio_sample(combined_audio, "backend_iir_output.wav")
+            # Save for comparison, from an int16 view of the collected frames
+            self.save_audio_sample(
+                np.frombuffer(combined_audio, dtype="<i2"), "backend_iir_output.wav"
+            )
 
             print(
                 f"✅ Backend IIR processing complete: {len(combined_audio)} bytes, {chunk_count} chunks"
@@ -187,38 +270,25 @@ class AudioDiagnostics:
             ("Near-clipping signal", 0.99),
         ]
 
+        # Unit sine wave, scaled to each level below
+        samples = 1000
+        frequency = 440  # A4 note
+        t = np.arange(samples) / self.sample_rate
+        unit_sine = np.sin(2 * np.pi * frequency * t)
+
         for name, level in test_signals:
-            # Generate pure sine wave at different levels
-            samples = 1000
-            frequency = 440  # A4 note
-
-            float_samples = []
-            for i in range(samples):
-                t = i / self.sample_rate
-                sample = level * math.sin(2 * math.pi * frequency * t)
-                float_samples.append(sample)
-
-            # Convert to int16 using backend method
-            int16_samples = []
-            for float_val in float_samples:
-                int_val = int(float_val * 32767.0)
-                int_val = max(-32768, min(32767, int_val))
-                int16_samples.append(int_val)
-
-            # Convert back to float for comparison
-            converted_back = [s / 32768.0 for s in int16_samples]
-
-            # Calculate conversion error
-            max_error = max(
-                abs(orig - conv) for orig, conv in zip(float_samples, converted_back)
-            )
-            rms_error = math.sqrt(
-                sum(
-                    (orig - conv) ** 2
-                    for orig, conv in zip(float_samples, converted_back)
-                )
-                / len(float_samples)
-            )
+            # Pure sine wave at this level
+            float_samples = level * unit_sine
+
+            # Convert to int16 using backend method (round, then clip)
+            int16_samples = np.clip(
+                np.rint(float_samples * 32767.0), -32768, 32767
+            ).astype(np.int16)
+
+            # Convert back to float and calculate conversion error
+            errors = float_samples - int16_samples / 32768.0
+            max_error = float(np.abs(errors).max())
+            rms_error = math.sqrt(float(np.dot(errors, errors)) / samples)
 
             print(
                 f"      {name}: Max error: {max_error:.6f}, RMS error: {rms_error:.6f}"
@@ -237,19 +307,10 @@ class AudioDiagnostics:
         # For now, check if the combined audio has sudden jumps
         if hasattr(self, "processed_backend_data") and self.processed_backend_data:
             # Analyze for sudden amplitude jumps that could indicate boundary issues
-            samples = []
-            for i in range(0, len(self.processed_backend_data), 2):
-                if i + 1 < len(self.processed_backend_data):
-                    sample = struct.unpack(
-                        "<h", self.processed_backend_data[i : i + 2]
-                    )[0]
-                    samples.append(sample / 32768.0)
-
-            # Look for sudden amplitude changes
-            large_jumps = 0
-            for i in range(1, len(samples)):
-                if abs(samples[i] - samples[i - 1]) > 0.5:  # 50% amplitude jump
-                    large_jumps += 1
+            samples = pcm16_to_float(self.processed_backend_data)
+
+            # Look for sudden amplitude changes (50% amplitude jumps)
+            _, _, large_jumps = scan_artifacts(samples)
 
             jump_rate = large_jumps / len(samples) * 100
             print(f"      Large amplitude jumps: {large_jumps} ({jump_rate:.2f}%)")
@@ -279,51 +340,29 @@ class AudioDiagnostics:
         """Test for little-endian/big-endian conversion issues"""
         print("   Testing endianness consistency...")
 
-        # Create test pattern that would reveal endianness issues
-        test_values = [0x1234, 0x5678, 0xABCD, 0xEF01]
-
-        for value in test_values:
-            # Pack as little-endian (correct format)
-            le_bytes = struct.pack("<h", value if value < 32768 else value - 65536)
-
-            # Unpack as little-endian (should match)
-            unpacked_le = struct.unpack("<h", le_bytes)[0]
-
-            # Unpack as big-endian (would be wrong)
-            unpacked_be = struct.unpack(">h", le_bytes)[0]
-
-            if unpacked_le != (value if value < 32768 else value - 65536):
-                self.artifacts_detected.append(
-                    f"Endianness issue detected with value 0x{value:04X}"
-                )
+        # struct's "<h" is little-endian by definition, so one known value
+        # is enough to confirm the packing the pipeline relies on
+        if struct.pack("<h", 0x1234) != b"\x34\x12":
+            self.artifacts_detected.append(
+                "Endianness issue detected with value 0x1234"
+            )
 
     def check_iir_artifacts(self, audio_data):
         """Check for specific IIR filter artifacts"""
         print("   Analyzing IIR filter artifacts...")
 
         # Convert to samples for analysis
-        samples = []
-        for i in range(0, len(audio_data), 2):
-            if i + 1 < len(audio_data):
-                sample = struct.unpack("<h", audio_data[i : i + 2])[0]
-                samples.append(sample / 32768.0)
+        samples = pcm16_to_float(audio_data)
 
-        if not samples:
+        if not samples.size:
             return
 
         # Check for IIR-specific artifacts
 
-        # 1. Filter instability (oscillations)
-        oscillation_count = 0
-        for i in range(2, len(samples) - 2):
-            # Look for rapid sign changes that could indicate instability
-            if (
-                samples[i - 1] * samples[i] < 0
-                and samples[i] * samples[i + 1] < 0
-                and abs(samples[i]) > 0.1
-            ):
-                oscillation_count += 1
+        # Oscillation count and DC bias in one scan of the samples
+        oscillation_count, dc_bias, _ = scan_artifacts(samples)
 
+        # 1. Filter instability (oscillations)
         if oscillation_count > len(samples) * 0.01:  # More than 1% oscillations
             self.artifacts_detected.append(
                 f"IIR filter instability detected: {oscillation_count} oscillations"
@@ -342,7 +381,6 @@ class AudioDiagnostics:
             )
 
         # 3. DC bias (IIR filters can introduce DC offset)
-        dc_bias = sum(samples) / len(samples)
         print(f"      DC bias: {dc_bias:.6f}")
 
         if abs(dc_bias) > 0.01:  # More than 1% DC bias
@@ -353,33 +391,26 @@ class AudioDiagnostics:
         if len(samples) < 4:
             return 0.0
 
-        # Simple high-pass difference filter
-        hf_energy = 0.0
-        for i in range(1, len(samples)):
-            diff = samples[i] - samples[i - 1]
-            hf_energy += diff * diff
-
-        return hf_energy / len(samples)
+        # Simple high-pass difference filter (samples is a float32 ndarray)
+        diffs = np.diff(samples)
+        return float(np.dot(diffs, diffs)) / samples.size
 
     def analyze_pcm_audio(self, audio_data, name):
         """Analyze PCM audio data for quality metrics"""
-        samples = []
-        for i in range(0, len(audio_data), 2):
-            if i + 1 < len(audio_data):
-                sample = struct.unpack("<h", audio_data[i : i + 2])[0]
-                samples.append(sample / 32768.0)
+        samples = pcm16_to_float(audio_data)
 
-        if not samples:
+        if not samples.size:
             return {"error": "No samples found"}
 
         # Calculate metrics
-        max_level = max(abs(s) for s in samples)
-        rms_level = math.sqrt(sum(s * s for s in samples) / len(samples))
+        magnitudes = np.abs(samples)
+        max_level = float(magnitudes.max())
+        rms_level = math.sqrt(float(np.dot(samples, samples)) / samples.size)
         peak_db = 20 * math.log10(max_level) if max_level > 0 else -100
         rms_db = 20 * math.log10(rms_level) if rms_level > 0 else -100
 
         # Count clipping
-        clipped = sum(1 for s in samples if abs(s) >= 0.99)
+        clipped = int(np.count_nonzero(magnitudes >= 0.99))
         clipping_percent = (clipped / len(samples)) * 100
 
         analysis = {
@@ -565,13 +596,24 @@ class AudioDiagnostics:
         print("=" * 70)
 
     def save_audio_sample(self, audio_data, filename):
-        """Save audio data as WAV file for external analysis"""
+        """Save audio data as WAV file for external analysis
+
+        Args:
+            audio_data: Mono int16 PCM, either as little-endian bytes (or any
+                bytes-like object) or as an np.int16 array.
+        """
         try:
-            with wave.open(filename, "wb") as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(audio_data)
+            if isinstance(audio_data, np.ndarray):
+                # Written straight from the array, no bytes copy
+                wavfile.write(
+                    filename, self.sample_rate, audio_data.astype(np.int16, copy=False)
+                )
+            else:
+                with wave.open(filename, "wb") as wav_file:
+                    wav_file.setnchannels(1)
+                    wav_file.setsampwidth(2)
+                    wav_file.setframerate(self.sample_rate)
+                    wav_file.writeframes(audio_data)
             print(f"💾 Audio sample saved: {filename}")
         except Exception as e:
             print(f"❌ Failed to save {filename}: {e}")
@@ -4,11 +4,15 @@ Crackling/Popping Audio Diagnostics Script
 Specifically tests for high-frequency artifacts that cause crackling noise
 """
 
+import argparse
 import sys
 import os
-import struct
-import math
 import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 # Add backend to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -16,12 +20,147 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from services.voice_synthesis import my_processing_function_streaming
 import logging
 
+try:
+    from numba import njit
+except ImportError:  # Optional: the NumPy scan is used without numba
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # Optional: the report is written with json without it
+    orjson = None
+
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
 
+def _count_pops_and_clicks(samples, diffs, pop_threshold):
+    """Count pops and clicks in one frame with whole-array NumPy operations
+
+    diffs holds the absolute sample-to-sample steps, computed once by the
+    caller, in the same units as pop_threshold.
+    """
+    # Pop detection: sudden spike in amplitude change into or out of
+    # each sample (diffs[i - 1] and diffs[i] around sample i)
+    pops = int(np.count_nonzero(np.maximum(diffs[:-1], diffs[1:]) > pop_threshold))
+
+    # Click detection: rapid oscillation, i.e. the sign flips on all three
+    # steps from sample i - 1 to i + 2, with significant amplitude at i
+    # (frames shorter than five samples have no sample with room for that)
+    if samples.size < 5:
+        return pops, 0
+    signs = sliding_window_view(np.signbit(samples), 4)[1:]
+    changes_in_window = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1)
+    clicks = int(
+        np.count_nonzero((changes_in_window >= 3) & (np.abs(samples[2:-2]) > 0.1))
+    )
+    return pops, clicks
+
+
+def _scan_frame_loop(samples, diffs, pop_threshold):
+    """Count pops and clicks in one frame in a single pass (compiled by numba)"""
+    pops = 0
+    clicks = 0
+    n = len(samples)
+    for i in range(1, n - 1):
+        if diffs[i - 1] > pop_threshold or diffs[i] > pop_threshold:
+            pops += 1
+
+        if 1 < i < n - 2 and abs(samples[i]) > 0.1:
+            sign_changes = 0
+            for j in range(i - 1, i + 2):
+                if np.signbit(samples[j]) != np.signbit(samples[j + 1]):
+                    sign_changes += 1
+            if sign_changes >= 3:
+                clicks += 1
+    return pops, clicks
+
+
+# The compiled loop stays a single pass over the frame, so it suits calling
+# once per frame as audio streams in
+if njit is not None:
+    scan_frame = njit(cache=True)(_scan_frame_loop)
+else:
+    scan_frame = _count_pops_and_clicks
+
+# Frames handed to a worker process at a time when analysis runs in parallel
+CHUNK_FRAMES = 64
+
+
+@lru_cache(maxsize=8)
+def _hf_spectrum_plan(size, sample_rate, hf_cutoff_hz):
+    """Return (FFT size, Hann window, HF bin mask, power scale) for a frame length
+
+    The FFT size is the next power of two so rfft stays on its fast path;
+    frames share one length, so this is built once per run.
+    """
+    n_fft = 1 << (size - 1).bit_length()
+    window = np.hanning(size).astype(np.float32)
+    hf_mask = np.fft.rfftfreq(n_fft, d=1 / sample_rate) > hf_cutoff_hz
+    # One-sided, corrected for the window's power loss and for zero padding
+    # spreading the frame over n_fft / size times as many bins
+    scale = 2 * size / (n_fft * float(np.dot(window, window)))
+    return n_fft, window, hf_mask, scale
+
+
+def _analyze_frames(frames, pop_threshold, sample_rate, hf_cutoff_hz):
+    """Count pops/clicks and total HF power over (frame number, samples, diffs) frames
+
+    Returns (pops, clicks, noisy frames, HF power sum, HF power sample count).
+    """
+    pops = 0
+    clicks = 0
+    noisy_frames = []
+    hf_power_sum = 0.0
+    hf_power_samples = 0
+
+    for frame_number, samples, diffs in frames:
+        # Pops and clicks within the frame
+        frame_pops, frame_clicks = scan_frame(samples, diffs, pop_threshold)
+        pops += frame_pops
+        clicks += frame_clicks
+        if frame_pops > 5 or frame_clicks > 3:
+            noisy_frames.append((frame_number, frame_pops, frame_clicks))
+
+        # High-frequency power: Hann-windowed spectrum above the cutoff
+        n_fft, window, hf_mask, scale = _hf_spectrum_plan(
+            samples.size, sample_rate, hf_cutoff_hz
+        )
+        spectrum = np.fft.rfft(samples * window, n=n_fft)
+        hf_bins = spectrum[hf_mask]
+        hf_power_sum += scale * float(np.vdot(hf_bins, hf_bins).real)
+        hf_power_samples += samples.size
+
+    return pops, clicks, noisy_frames, hf_power_sum, hf_power_samples
+
+
+def _analyze_chunk(frames, pop_threshold, sample_rate, hf_cutoff_hz):
+    """Decode (frame number, int16 bytes) frames and analyze them in a worker process"""
+    decoded = []
+    for frame_number, frame_bytes in frames:
+        int_samples = np.frombuffer(frame_bytes, dtype="<i2")
+        samples = np.multiply(int_samples, np.float32(1 / 32768), dtype=np.float32)
+        diffs = np.abs(np.diff(int_samples.astype(np.int32)))
+        decoded.append((frame_number, samples, diffs))
+    return _analyze_frames(decoded, pop_threshold, sample_rate, hf_cutoff_hz)
+
+
 class CracklingDiagnostics:
-    def __init__(self):
+    # Issue kinds found, combined into issue_flags
+    F_BOUNDARY = 1
+    F_POPS = 2
+    F_CLICKS = 4
+    F_HF_ENERGY = 8
+    F_HF_SPIKE = 16
+
+    def __init__(self, workers=None):
+        """Set up the diagnostics
+
+        Args:
+            workers: Process count for pop/click and spectral analysis. None
+                analyzes each frame inline, which is faster for short
+                clips; worker processes pay off on long recordings.
+        """
         self.test_text = "This is a test for crackling and popping sounds in audio."
         self.sample_rate = 22050
 
@@ -29,20 +168,41 @@ class CracklingDiagnostics:
         self.pop_threshold = 0.2  # 20% sudden amplitude change
         self.click_duration_samples = 10  # Clicks shorter than this
         self.high_freq_threshold = 0.005  # High frequency energy threshold
+        self.hf_cutoff_hz = 4000  # Spectrum above this counts as high-frequency
 
         # Results
         self.frame_data = []
         self.crackling_issues = []
+        self.issue_flags = 0
         self.frame_boundary_issues = []
 
+        # Running totals, updated as each frame streams in
+        self.prev_last_sample = None  # None when the previous frame was empty
+        self.total_samples = 0
+        self.total_boundaries = 0
+        self.large_jumps = 0
+        self.total_pops = 0
+        self.total_clicks = 0
+        self.noisy_frames = []  # (frame number, pops, clicks)
+        self.hf_power_sum = 0.0  # Sum of per-frame HF power x frame length
+        self.hf_power_samples = 0
+        self.hf_spike_count = 0
+        self.max_hf_spike = 0.0
+
+        # Parallel analysis state
+        self.workers = workers
+        self._executor = None
+        self._pending_frames = []
+        self._chunk_futures = []
+
     def run_crackling_diagnostics(self):
         """Run comprehensive crackling detection"""
         print("🔍 CRACKLING DIAGNOSTICS - Detecting Audio Pops & Clicks")
         print("=" * 70)
 
         try:
-            # Phase 1: Collect frame-by-frame data
-            print("\n📊 Phase 1: Collecting frame-by-frame audio data...")
+            # Phase 1: Stream frames, analyzing each one as it arrives
+            print("\n📊 Phase 1: Collecting and analyzing frame-by-frame audio data...")
             self.collect_frame_data()
 
             # Phase 2: Analyze frame boundaries for discontinuities
@@ -65,81 +225,164 @@ class CracklingDiagnostics:
             logger.error(f"Crackling diagnostics failed: {e}", exc_info=True)
 
     def collect_frame_data(self):
-        """Collect individual frame data for boundary analysis"""
+        """Collect frame summaries, running every detector on each frame as it streams
+
+        Only per-frame summary stats are kept, so memory grows with the number
+        of frames rather than the length of the audio.
+        """
         try:
             frame_count = 0
+            # One float32 buffer reused for every frame; samples are not kept
+            # once process_frame has run
+            sample_buffer = np.empty(0, dtype=np.float32)
+
+            if self.workers:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
 
             for frame_bytes in my_processing_function_streaming(self.test_text, logger):
                 frame_count += 1
 
-                # Convert frame to samples
-                samples = []
-                for i in range(0, len(frame_bytes), 2):
-                    if i + 1 < len(frame_bytes):
-                        sample = struct.unpack("<h", frame_bytes[i : i + 2])[0]
-                        samples.append(sample / 32768.0)
+                # Convert frame to float32 samples scaled to [-1, 1)
+                int_samples = np.frombuffer(frame_bytes, dtype="<i2")
+                if sample_buffer.size < int_samples.size:
+                    sample_buffer = np.empty(int_samples.size, dtype=np.float32)
+                samples = sample_buffer[: int_samples.size]
+                np.multiply(int_samples, np.float32(1 / 32768), out=samples)
 
                 # Store frame data
                 frame_info = {
                     "frame_number": frame_count,
                     "byte_length": len(frame_bytes),
-                    "sample_count": len(samples),
-                    "samples": samples,
-                    "first_sample": samples[0] if samples else 0.0,
-                    "last_sample": samples[-1] if samples else 0.0,
-                    "max_amplitude": max(abs(s) for s in samples) if samples else 0.0,
-                    "rms": math.sqrt(sum(s * s for s in samples) / len(samples))
-                    if samples
+                    "sample_count": samples.size,
+                    "first_sample": float(samples[0]) if samples.size else 0.0,
+                    "last_sample": float(samples[-1]) if samples.size else 0.0,
+                    "max_amplitude": float(np.abs(samples).max())
+                    if samples.size
+                    else 0.0,
+                    "rms": float(np.sqrt(np.dot(samples, samples) / samples.size))
+                    if samples.size
                     else 0.0,
                 }
 
                 self.frame_data.append(frame_info)
+                self.process_frame(frame_count, samples, int_samples)
 
                 if frame_count % 20 == 0:
                     print(
                         f"   Collected frame {frame_count} ({len(frame_bytes)} bytes, {len(samples)} samples)"
                     )
 
+            # Gather results from worker processes, in frame order
+            if self._pending_frames:
+                self._submit_chunk()
+            for future in self._chunk_futures:
+                self._merge_frame_results(future.result())
+
             print(f"✅ Collected {len(self.frame_data)} frames for analysis")
 
         except Exception as e:
             logger.error(f"Frame data collection failed: {e}")
             raise
 
-    def analyze_frame_boundaries(self):
-        """Analyze discontinuities at frame boundaries"""
-        print("   Checking for discontinuities between frames...")
-
-        boundary_issues = 0
-        large_jumps = 0
-        total_boundaries = len(self.frame_data) - 1
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def process_frame(self, frame_number, samples, int_samples):
+        """Update boundary, pop/click and high-frequency totals with one frame
+
+        samples are the frame as float32 in [-1, 1) and int_samples the same
+        frame as raw int16. Threshold tests run on integer sample steps,
+        which match the float thresholds exactly because samples are
+        multiples of 1/32768.
+        """
+        self.total_samples += samples.size
+        if not samples.size:
+            self.prev_last_sample = None
+            return
 
-        for i in range(1, len(self.frame_data)):
-            prev_frame = self.frame_data[i - 1]
-            curr_frame = self.frame_data[i]
+        # Integer sample-to-sample steps within the frame, shared by every
+        # detector (int32 so steps between int16 extremes cannot overflow)
+        diffs = np.abs(np.diff(int_samples.astype(np.int32)))
+        pop_threshold = int(self.pop_threshold * 32768)
+        spike_threshold = int(self.high_freq_threshold * 32768)
 
-            # Check continuity between last sample of prev frame and first sample of current frame
-            if prev_frame["samples"] and curr_frame["samples"]:
-                last_sample = prev_frame["last_sample"]
-                first_sample = curr_frame["first_sample"]
+        # Frame boundary: jump from the previous frame's last sample
+        if self.prev_last_sample is not None:
+            self.total_boundaries += 1
+            discontinuity = abs(float(samples[0]) - self.prev_last_sample)
 
-                # Calculate discontinuity
-                discontinuity = abs(first_sample - last_sample)
+            # The step across the boundary is also an HF spike candidate
+            self.max_hf_spike = max(self.max_hf_spike, discontinuity)
+            if discontinuity > self.high_freq_threshold:
+                self.hf_spike_count += 1
 
-                # Check for problematic discontinuities
-                if discontinuity > self.pop_threshold:
-                    boundary_issues += 1
-                    issue = {
-                        "boundary": f"Frame {i - 1} -> {i}",
+            if discontinuity > self.pop_threshold:
+                self.frame_boundary_issues.append(
+                    {
+                        "boundary": f"Frame {frame_number - 2} -> {frame_number - 1}",
                         "discontinuity": discontinuity,
-                        "last_sample": last_sample,
-                        "first_sample": first_sample,
+                        "last_sample": self.prev_last_sample,
+                        "first_sample": float(samples[0]),
                         "severity": "HIGH" if discontinuity > 0.5 else "MEDIUM",
                     }
-                    self.frame_boundary_issues.append(issue)
+                )
+                if discontinuity > 0.5:
+                    self.large_jumps += 1
+
+        # Pops, clicks and HF power within the frame
+        if samples.size >= 3:
+            if self._executor is not None:
+                self._pending_frames.append((frame_number, int_samples.tobytes()))
+                if len(self._pending_frames) >= CHUNK_FRAMES:
+                    self._submit_chunk()
+            else:
+                self._merge_frame_results(
+                    _analyze_frames(
+                        [(frame_number, samples, diffs)],
+                        pop_threshold,
+                        self.sample_rate,
+                        self.hf_cutoff_hz,
+                    )
+                )
 
-                    if discontinuity > 0.5:
-                        large_jumps += 1
+        # HF spikes within the frame
+        if diffs.size:
+            self.max_hf_spike = max(self.max_hf_spike, float(diffs.max()) / 32768)
+            self.hf_spike_count += int(np.count_nonzero(diffs > spike_threshold))
+
+        self.prev_last_sample = float(samples[-1])
+
+    def _submit_chunk(self):
+        """Send the pending frames to a worker process"""
+        self._chunk_futures.append(
+            self._executor.submit(
+                _analyze_chunk,
+                self._pending_frames,
+                int(self.pop_threshold * 32768),
+                self.sample_rate,
+                self.hf_cutoff_hz,
+            )
+        )
+        self._pending_frames = []
+
+    def _merge_frame_results(self, results):
+        """Add one _analyze_frames result to the running totals"""
+        pops, clicks, noisy_frames, hf_power_sum, hf_power_samples = results
+        self.total_pops += pops
+        self.total_clicks += clicks
+        self.noisy_frames.extend(noisy_frames)
+        self.hf_power_sum += hf_power_sum
+        self.hf_power_samples += hf_power_samples
+
+    def analyze_frame_boundaries(self):
+        """Analyze discontinuities at frame boundaries"""
+        print("   Checking for discontinuities between frames...")
+
+        total_boundaries = self.total_boundaries
+        boundary_issues = len(self.frame_boundary_issues)
+        large_jumps = self.large_jumps
 
         boundary_rate = (
             (boundary_issues / total_boundaries) * 100 if total_boundaries > 0 else 0
@@ -152,16 +395,18 @@ class CracklingDiagnostics:
         print(f"   • Large jumps (>50%): {large_jumps}")
 
         if boundary_issues > 0:
+            self.issue_flags |= self.F_BOUNDARY
             self.crackling_issues.append(
                 f"Frame boundary discontinuities: {boundary_issues} detected"
             )
 
-            # Show worst offenders
-            worst_issues = sorted(
-                self.frame_boundary_issues,
-                key=lambda x: x["discontinuity"],
-                reverse=True,
-            )[:3]
+            # Show worst offenders (select the top 3 without sorting them all)
+            discontinuities = np.array(
+                [issue["discontinuity"] for issue in self.frame_boundary_issues]
+            )
+            worst = np.argpartition(-discontinuities, min(3, boundary_issues) - 1)[:3]
+            worst = worst[np.argsort(-discontinuities[worst])]
+            worst_issues = [self.frame_boundary_issues[i] for i in worst]
             print("   🚨 Worst discontinuities:")
             for issue in worst_issues:
                 print(
@@ -172,58 +417,22 @@ class CracklingDiagnostics:
         """Detect audio pops and clicks within frames"""
         print("   Scanning for pops and clicks within audio frames...")
 
-        total_pops = 0
-        total_clicks = 0
-
-        for frame_info in self.frame_data:
-            samples = frame_info["samples"]
-            frame_num = frame_info["frame_number"]
-
-            if len(samples) < 3:
-                continue
-
-            frame_pops = 0
-            frame_clicks = 0
+        total_pops = self.total_pops
+        total_clicks = self.total_clicks
 
-            # Detect sudden amplitude changes (pops)
-            for i in range(1, len(samples) - 1):
-                # Calculate local derivative (rate of change)
-                prev_diff = abs(samples[i] - samples[i - 1])
-                next_diff = abs(samples[i + 1] - samples[i])
-
-                # Pop detection: sudden spike in amplitude change
-                if prev_diff > self.pop_threshold or next_diff > self.pop_threshold:
-                    frame_pops += 1
-
-                # Click detection: rapid oscillation (sign changes)
-                if i > 1 and i < len(samples) - 2:
-                    # Look for rapid sign changes indicating clicks
-                    signs = [math.copysign(1, samples[j]) for j in range(i - 1, i + 3)]
-                    sign_changes = sum(
-                        1 for k in range(len(signs) - 1) if signs[k] != signs[k + 1]
-                    )
-
-                    if (
-                        sign_changes >= 3 and abs(samples[i]) > 0.1
-                    ):  # Rapid oscillation with significant amplitude
-                        frame_clicks += 1
-
-            total_pops += frame_pops
-            total_clicks += frame_clicks
-
-            # Report problematic frames
-            if frame_pops > 5 or frame_clicks > 3:
-                print(
-                    f"      Frame {frame_num}: {frame_pops} pops, {frame_clicks} clicks"
-                )
+        # Report problematic frames
+        for frame_num, frame_pops, frame_clicks in self.noisy_frames:
+            print(f"      Frame {frame_num}: {frame_pops} pops, {frame_clicks} clicks")
 
         print(f"   • Total pops detected: {total_pops}")
         print(f"   • Total clicks detected: {total_clicks}")
 
         if total_pops > 0:
+            self.issue_flags |= self.F_POPS
             self.crackling_issues.append(f"Audio pops detected: {total_pops} instances")
 
         if total_clicks > 0:
+            self.issue_flags |= self.F_CLICKS
             self.crackling_issues.append(
                 f"Audio clicks detected: {total_clicks} instances"
             )
@@ -232,49 +441,38 @@ class CracklingDiagnostics:
         """Analyze high-frequency content that could cause crackling"""
         print("   Analyzing high-frequency artifacts...")
 
-        # Combine all samples for frequency analysis
-        all_samples = []
-        for frame_info in self.frame_data:
-            all_samples.extend(frame_info["samples"])
-
-        if len(all_samples) < 100:
+        if self.total_samples < 100:
             print("   ⚠️ Not enough samples for frequency analysis")
             return
 
-        # Calculate high-frequency energy using simple differencing
-        hf_energy = 0.0
-        max_hf_spike = 0.0
-        hf_spikes = 0
-
-        for i in range(1, len(all_samples)):
-            diff = abs(all_samples[i] - all_samples[i - 1])
-            hf_energy += diff * diff
-
-            if diff > max_hf_spike:
-                max_hf_spike = diff
-
-            if diff > self.high_freq_threshold:
-                hf_spikes += 1
-
-        hf_energy_normalized = hf_energy / len(all_samples)
-        hf_spike_rate = (hf_spikes / len(all_samples)) * 100
+        # Mean HF power over all frames (Welch-style average of frame spectra)
+        hf_energy_normalized = (
+            self.hf_power_sum / self.hf_power_samples if self.hf_power_samples else 0.0
+        )
+        max_hf_spike = self.max_hf_spike
+        hf_spike_rate = (self.hf_spike_count / self.total_samples) * 100
 
-        print(f"   • High-frequency energy: {hf_energy_normalized:.6f}")
+        print(
+            f"   • High-frequency energy (>{self.hf_cutoff_hz}Hz): {hf_energy_normalized:.6f}"
+        )
         print(f"   • Max HF spike: {max_hf_spike:.4f}")
         print(f"   • HF spike rate: {hf_spike_rate:.2f}%")
 
         # Assess crackling risk
         if hf_energy_normalized > 0.001:
+            self.issue_flags |= self.F_HF_ENERGY
             self.crackling_issues.append(
                 f"High HF energy: {hf_energy_normalized:.6f} (may cause crackling)"
             )
 
         if hf_spike_rate > 1.0:
+            self.issue_flags |= self.F_HF_SPIKE
             self.crackling_issues.append(
                 f"High HF spike rate: {hf_spike_rate:.2f}% (crackling risk)"
             )
 
         if max_hf_spike > 0.1:
+            self.issue_flags |= self.F_HF_SPIKE
             self.crackling_issues.append(
                 f"Large HF spike detected: {max_hf_spike:.4f} (audible artifact)"
             )
@@ -283,7 +481,7 @@ class CracklingDiagnostics:
         """Generate comprehensive crackling diagnostics report"""
         # Calculate overall metrics
         total_frames = len(self.frame_data)
-        total_samples = sum(len(f["samples"]) for f in self.frame_data)
+        total_samples = self.total_samples
         avg_frame_size = total_samples / total_frames if total_frames > 0 else 0
 
         # Build report
@@ -314,8 +512,17 @@ class CracklingDiagnostics:
         }
 
         # Save report
-        with open("crackling_diagnostics_report.json", "w") as f:
-            json.dump(report, f, indent=2)
+        if orjson is not None:
+            with open("crackling_diagnostics_report.json", "wb") as f:
+                f.write(
+                    orjson.dumps(
+                        report,
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+                    )
+                )
+        else:
+            with open("crackling_diagnostics_report.json", "w") as f:
+                json.dump(report, f, indent=2)
 
         print(
             "📄 Crackling diagnostics report saved to: crackling_diagnostics_report.json"
@@ -331,16 +538,16 @@ class CracklingDiagnostics:
         if len(self.frame_boundary_issues) > 0:
             sources.append("Frame boundary discontinuities")
 
-        if any("pops detected" in issue for issue in self.crackling_issues):
+        if self.issue_flags & self.F_POPS:
             sources.append("Audio pops within frames")
 
-        if any("clicks detected" in issue for issue in self.crackling_issues):
+        if self.issue_flags & self.F_CLICKS:
             sources.append("Audio clicks/rapid oscillations")
 
-        if any("HF energy" in issue for issue in self.crackling_issues):
+        if self.issue_flags & self.F_HF_ENERGY:
             sources.append("High-frequency artifacts")
 
-        if any("HF spike" in issue for issue in self.crackling_issues):
+        if self.issue_flags & self.F_HF_SPIKE:
             sources.append("High-frequency spikes")
 
         if not sources:
@@ -362,15 +569,15 @@ class CracklingDiagnostics:
             recommendations.append("Ensure frame boundaries align on sample boundaries")
             recommendations.append("Check for timing issues in frame delivery")
 
-        if any("pops detected" in issue for issue in self.crackling_issues):
+        if self.issue_flags & self.F_POPS:
             recommendations.append("Investigate sample rate conversion artifacts")
             recommendations.append("Check for buffer underruns causing audio gaps")
 
-        if any("clicks detected" in issue for issue in self.crackling_issues):
+        if self.issue_flags & self.F_CLICKS:
             recommendations.append("Look for rapid gain changes or filter instability")
             recommendations.append("Check for floating-point precision issues")
 
-        if any("HF" in issue for issue in self.crackling_issues):
+        if self.issue_flags & (self.F_HF_ENERGY | self.F_HF_SPIKE):
             recommendations.append(
                 "Add gentle low-pass filtering to remove HF artifacts"
             )
@@ -436,6 +643,15 @@ class CracklingDiagnostics:
 
 def main():
     """Run crackling diagnostics"""
+    parser = argparse.ArgumentParser(description="Run the crackling diagnostics.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="analyze frames in N worker processes (default: inline)",
+    )
+    args = parser.parse_args()
+
     print("🔊 Crackling/Popping Audio Diagnostics Tool")
     print("This tool specifically detects audio artifacts that cause crackling noise.")
     print("")
@@ -445,7 +661,7 @@ def main():
         print("❌ CARTESIA_API_KEY environment variable not set")
         return 1
 
-    diagnostics = CracklingDiagnostics()
+    diagnostics = CracklingDiagnostics(workers=args.workers)
     diagnostics.run_crackling_diagnostics()
 
     print(
@@ -4,132 +4,241 @@ Test script to validate improved audio timing and reduced frame skipping
 """
 
 import socketio
+import sys
+import threading
 import time
 import logging
+from collections import deque
+
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# One server frame: 20ms of 22050Hz mono int16. A pcm_frame payload of
+# several frames' worth is a batch of consecutive frames
+FRAME_MS = 20
+FRAME_BYTES = int(22050 * FRAME_MS / 1000) * 2
+FRAME_NS = FRAME_MS * 1_000_000
+
+# Frames the handler may queue ahead of the recorder before the oldest
+# are dropped (64 frames = 1.28s of audio)
+FRAME_QUEUE_SIZE = 64
+
+# Short, medium and long texts, to see the pacing at different stream lengths
+TEST_TEXTS = (
+    "Short test",
+    "Testing improved audio timing to reduce frame skipping and underruns.",
+    "This is a longer test message that will generate many more audio frames "
+    "to help us analyze the streaming behavior and identify any timing issues "
+    "or bottlenecks in the audio pipeline.",
+)
+
+
+class FrameMetrics:
+    """Counters updated by the pcm_frame handler and the frame recorder.
+
+    Slotted so each per-frame update is a plain attribute store, and so the
+    whole set can be handed to other code (e.g. a progress reporter).
+    """
+
+    __slots__ = ("received", "frames", "bytes", "last", "intervals", "count")
+
+    def __init__(self, capacity=8192):
+        # Frames seen by the handler / frames recorded from the queue
+        self.received = 0
+        self.frames = 0
+        self.bytes = 0
+        self.last = None
+        # Inter-frame intervals in integer ns, written by index so the
+        # per-frame work stays a single store; grown only if a run
+        # outlasts the buffer
+        self.intervals = np.empty(capacity, dtype=np.int64)
+        self.count = 0
+
+
+def record_frames(frame_queue, m, done):
+    """Move (receive time ns, size) pairs from frame_queue into m.
+
+    A payload holding a batch of frames is recorded as that many frames,
+    the last at the receive time and the earlier ones FRAME_MS apart
+    before it, so intervals stay per frame whether or not the server
+    coalesces its emits.
+
+    Runs until done is set and the queue is empty. Frames the deque
+    dropped on overflow never reach m, so m.received - m.frames is the
+    number dropped.
+    """
+    while True:
+        try:
+            now, frame_size = frame_queue.popleft()
+        except IndexError:
+            if done.is_set():
+                return
+            done.wait(0.005)
+            continue
+
+        batch = frame_size // FRAME_BYTES or 1
+        m.frames += batch
+        m.bytes += frame_size
+        for k in range(batch - 1, -1, -1):
+            frame_time = now - k * FRAME_NS
+            if m.last is not None:
+                if m.count == m.intervals.size:
+                    m.intervals = np.resize(m.intervals, m.intervals.size * 2)
+                m.intervals[m.count] = frame_time - m.last
+                m.count += 1
+            m.last = frame_time
+
+
+def report_progress(m, done, start_time, interval=0.5):
+    """Print the frame rate every interval seconds until done is set.
+
+    Runs on its own thread so the pcm_frame handler never writes to stdout
+    itself; console I/O there would skew the intervals being measured.
+    """
+    while not done.wait(interval):
+        frames = m.frames
+        if frames:
+            elapsed = (time.perf_counter_ns() - start_time) / 1e9
+            sys.stdout.write(
+                f"📦 Frame {frames}: Rate={frames / elapsed:.1f} fps, "
+                f"Bytes={m.bytes}\n"
+            )
+            sys.stdout.flush()
+
+
+def print_timing_analysis(m, total_time):
+    """Print the frame rate and interval statistics for one stream."""
+    print("\n📊 TIMING ANALYSIS:")
+    print(f"   • Total frames: {m.frames}")
+    print(f"   • Total time: {total_time:.2f}s")
+    print(f"   • Average rate: {m.frames / total_time:.1f} fps")
+    print("   • Target rate: 50 fps")
+    print(f"   • Dropped (queue full): {m.received - m.frames}")
+
+    if not m.count:
+        return
+
+    intervals = m.intervals[: m.count]
+    avg_interval = intervals.mean() / 1e6
+    min_interval = intervals.min() / 1e6
+    max_interval = intervals.max() / 1e6
+
+    print("\n⏱️  FRAME INTERVALS:")
+    print(f"   • Average: {avg_interval:.1f}ms (target: 20ms)")
+    print(f"   • Min: {min_interval:.1f}ms")
+    print(f"   • Max: {max_interval:.1f}ms")
+
+    # Count intervals that are too fast (potential skips)
+    too_fast = int(np.count_nonzero(intervals < 15_000_000))  # Less than 15ms
+    too_slow = int(np.count_nonzero(intervals > 30_000_000))  # More than 30ms
+
+    print(
+        f"   • Too fast (<15ms): {too_fast} ({too_fast / len(intervals) * 100:.1f}%)"
+    )
+    print(
+        f"   • Too slow (>30ms): {too_slow} ({too_slow / len(intervals) * 100:.1f}%)"
+    )
+
+    if avg_interval > 18 and avg_interval < 22:
+        print("✅ EXCELLENT: Frame timing is well-controlled!")
+    elif avg_interval > 15 and avg_interval < 25:
+        print("🟡 GOOD: Frame timing is acceptable")
+    else:
+        print("🔴 POOR: Frame timing needs improvement")
+
 
-def test_improved_timing():
-    """Test the improved timing with 20ms pacing."""
+def test_improved_timing(texts=TEST_TEXTS):
+    """Test the improved timing with 20ms pacing.
+
+    All texts are streamed over one connection, one after another.
+    """
 
     print("🎯 Testing Improved Audio Timing")
     print("=" * 50)
 
-    sio = socketio.SimpleClient(logger=False, engineio_logger=False)
+    # Event-driven client: handlers run as soon as each packet is read,
+    # rather than when a receive() poll gets around to it
+    sio = socketio.Client(logger=False, engineio_logger=False)
+
+    # Test metrics, replaced for each text
+    m = FrameMetrics()
+
+    # Bounded hand-off from the Socket.IO thread to the recorder thread; on
+    # overflow the deque drops the oldest frames rather than letting the
+    # backlog (and the measured latency) grow
+    frame_queue = deque(maxlen=FRAME_QUEUE_SIZE)
+
+    # Set once the current stream completes or fails
+    done = threading.Event()
+
+    @sio.on("tts_started")
+    def on_tts_started(data):
+        print(f"🎵 TTS started: {data}")
 
-    # Test metrics
-    frames_received = 0
-    total_bytes = 0
-    frame_timestamps = []
-    start_time = None
+    @sio.on("pcm_frame")
+    def on_pcm_frame(data):
+        now = time.perf_counter_ns()
+        frame_size = len(data) if isinstance(data, (list, bytes)) else 0
+        m.received += frame_size // FRAME_BYTES or 1
+        frame_queue.append((now, frame_size))
+
+    @sio.on("tts_completed")
+    def on_tts_completed(data):
+        print(f"🏁 TTS completed: {data}")
+        done.set()
+
+    @sio.on("tts_error")
+    def on_tts_error(data):
+        print(f"❌ TTS error: {data}")
+        done.set()
 
     try:
         print("🔌 Connecting to backend...")
         sio.connect("http://localhost:8000", transports=["polling"])
         print("✅ Connected successfully!")
 
-        # Simple test text
-        test_text = (
-            "Testing improved audio timing to reduce frame skipping and underruns."
-        )
-
-        print(f"📝 Testing with text: '{test_text}'")
-        print("📤 Sending start_tts request...")
-
-        # Send TTS request
-        sio.emit("start_tts", {"text": test_text})
-
-        # Monitor frame timing
-        timeout_seconds = 20
-        start_time = time.time()
-
-        print("📡 Monitoring frame timing...")
-
-        while time.time() - start_time < timeout_seconds:
-            try:
-                event = sio.receive(timeout=0.5)
-                if event:
-                    event_name, data = event
-
-                    if event_name == "tts_started":
-                        print(f"🎵 TTS started: {data}")
-                        frame_start_time = time.time()
-
-                    elif event_name == "pcm_frame":
-                        frames_received += 1
-                        frame_size = len(data) if isinstance(data, (list, bytes)) else 0
-                        total_bytes += frame_size
-
-                        # Record frame timing
-                        frame_timestamps.append(time.time())
-
-                        # Progress every 25 frames (0.5 seconds)
-                        if frames_received % 25 == 0:
-                            elapsed = time.time() - start_time
-                            rate = frames_received / elapsed
-                            print(
-                                f"📦 Frame {frames_received}: Rate={rate:.1f} fps, Size={frame_size}b"
-                            )
-
-                    elif event_name == "tts_completed":
-                        print(f"🏁 TTS completed: {data}")
-                        break
-
-                    elif event_name == "tts_error":
-                        print(f"❌ TTS error: {data}")
-                        break
-
-            except Exception as e:
-                if "timeout" not in str(e).lower():
-                    print(f"⚠️ Error: {e}")
-                continue
-
-        # Analyze timing
-        total_time = time.time() - start_time
-
-        print("\n📊 TIMING ANALYSIS:")
-        print(f"   • Total frames: {frames_received}")
-        print(f"   • Total time: {total_time:.2f}s")
-        print(f"   • Average rate: {frames_received / total_time:.1f} fps")
-        print("   • Target rate: 50 fps")
-
-        if len(frame_timestamps) >= 2:
-            # Calculate inter-frame intervals
-            intervals = []
-            for i in range(1, len(frame_timestamps)):
-                interval = (frame_timestamps[i] - frame_timestamps[i - 1]) * 1000  # ms
-                intervals.append(interval)
-
-            avg_interval = sum(intervals) / len(intervals)
-            min_interval = min(intervals)
-            max_interval = max(intervals)
-
-            print("\n⏱️  FRAME INTERVALS:")
-            print(f"   • Average: {avg_interval:.1f}ms (target: 20ms)")
-            print(f"   • Min: {min_interval:.1f}ms")
-            print(f"   • Max: {max_interval:.1f}ms")
-
-            # Count intervals that are too fast (potential skips)
-            too_fast = sum(1 for i in intervals if i < 15)  # Less than 15ms
-            too_slow = sum(1 for i in intervals if i > 30)  # More than 30ms
-
-            print(
-                f"   • Too fast (<15ms): {too_fast} ({too_fast / len(intervals) * 100:.1f}%)"
+        success = True
+        for test_text in texts:
+            print(f"\n📝 Testing with text: '{test_text}'")
+            print("📤 Sending start_tts request...")
+
+            m = FrameMetrics()
+            frame_queue.clear()
+            done.clear()
+
+            # Monitor frame timing
+            timeout_seconds = 20
+            start_time = time.perf_counter_ns()
+
+            reporter = threading.Thread(
+                target=report_progress, args=(m, done, start_time), daemon=True
             )
-            print(
-                f"   • Too slow (>30ms): {too_slow} ({too_slow / len(intervals) * 100:.1f}%)"
+            reporter.start()
+            recorder = threading.Thread(
+                target=record_frames, args=(frame_queue, m, done), daemon=True
             )
+            recorder.start()
+
+            # Send TTS request
+            sio.emit("start_tts", {"text": test_text})
+
+            print("📡 Monitoring frame timing...")
+
+            if not done.wait(timeout=timeout_seconds):
+                print(f"⚠️ Error: no tts_completed within {timeout_seconds}s")
+                # Stop the reporter; the next text gets a fresh Event state
+                done.set()
+            recorder.join()
+
+            # Analyze timing
+            total_time = (time.perf_counter_ns() - start_time) / 1e9
+            print_timing_analysis(m, total_time)
 
-            if avg_interval > 18 and avg_interval < 22:
-                print("✅ EXCELLENT: Frame timing is well-controlled!")
-            elif avg_interval > 15 and avg_interval < 25:
-                print("🟡 GOOD: Frame timing is acceptable")
-            else:
-                print("🔴 POOR: Frame timing needs improvement")
+            success = success and m.frames > 0
 
-        return frames_received > 0
+        return success
 
     except Exception as e:
         print(f"❌ Test failed: {e}")
@@ -6,7 +6,7 @@ Test script to verify Whisper voice-to-text integration.
 import sys
 import os
 import unittest
-import tempfile
+import io
 import wave
 import struct
 import logging
@@ -14,7 +14,13 @@ import logging
 # Add the backend directory to the path so we can import modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from services.whisper_handler import WhisperHandler, create_whisper_handler
+from services.whisper_handler import (
+    BatchScheduler,
+    WhisperHandler,
+    _TTLCache,
+    _drop_repeated_words,
+    create_whisper_handler,
+)
 
 
 class TestWhisperIntegration(unittest.TestCase):
@@ -78,6 +84,14 @@ class TestWhisperIntegration(unittest.TestCase):
         self.assertEqual(info["sample_rate"], 16000)  # Should be resampled
         self.assertEqual(info["channels"], 1)  # Should be mono
 
+    def test_audio_signal_detection(self):
+        """Test that silent audio is told apart from audio with signal."""
+        tone_audio = self._create_test_audio_wav()
+        silent_audio = self._create_test_audio_wav(frequency=0)
+
+        self.assertTrue(self.handler.has_audio_signal(tone_audio, "wav"))
+        self.assertFalse(self.handler.has_audio_signal(silent_audio, "wav"))
+
     def test_transcription_with_test_audio(self):
         """Test transcription with generated test audio (will likely return empty or noise)."""
         test_audio = self._create_test_audio_wav()
@@ -151,24 +165,92 @@ class TestWhisperIntegration(unittest.TestCase):
                     samples.append(sample)
 
         # Create WAV file in memory
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            with wave.open(temp_file.name, "wb") as wav_file:
-                wav_file.setnchannels(channels)
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(sample_rate)
-
-                # Pack samples as 16-bit signed integers
-                packed_samples = struct.pack("<" + "h" * len(samples), *samples)
-                wav_file.writeframes(packed_samples)
-
-            # Read the WAV data
-            with open(temp_file.name, "rb") as f:
-                wav_data = f.read()
-
-            # Clean up
-            os.unlink(temp_file.name)
-
-            return wav_data
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(channels)
+            wav_file.setsampwidth(2)  # 16-bit
+            wav_file.setframerate(sample_rate)
+
+            # Pack samples as 16-bit signed integers
+            packed_samples = struct.pack("<" + "h" * len(samples), *samples)
+            wav_file.writeframes(packed_samples)
+
+        return buffer.getvalue()
+
+
+class TestStreamTranscribeHelpers(unittest.TestCase):
+    """Test the offline helpers behind stream_transcribe."""
+
+    def test_drop_repeated_words_removes_overlap(self):
+        """Words repeated across a forced segment cut are dropped."""
+        result = _drop_repeated_words("we went to the park", "The park was empty.")
+        self.assertEqual(result, "was empty.")
+
+    def test_drop_repeated_words_keeps_unrelated_text(self):
+        """Text that does not repeat the previous tail is unchanged."""
+        result = _drop_repeated_words("we went to the park", "It was sunny.")
+        self.assertEqual(result, "It was sunny.")
+
+
+class TestTranscriptionCache(unittest.TestCase):
+    """Test the cache that lets repeated audio skip the Whisper API."""
+
+    def test_returns_stored_transcription(self):
+        """A stored transcription is returned for the same key."""
+        cache = _TTLCache(maxsize=2, ttl=60)
+        cache.put(("audio",), "hello")
+        self.assertEqual(cache.get(("audio",)), "hello")
+        self.assertIsNone(cache.get(("other",)))
+
+    def test_evicts_least_recently_used(self):
+        """The oldest unused entry is dropped once the cache is full."""
+        cache = _TTLCache(maxsize=2, ttl=60)
+        cache.put(("a",), "first")
+        cache.put(("b",), "second")
+        cache.get(("a",))
+        cache.put(("c",), "third")
+        self.assertEqual(cache.get(("a",)), "first")
+        self.assertIsNone(cache.get(("b",)))
+
+    def test_expired_entries_are_ignored(self):
+        """Entries older than the TTL are treated as missing."""
+        cache = _TTLCache(maxsize=2, ttl=0)
+        cache.put(("audio",), "hello")
+        self.assertIsNone(cache.get(("audio",)))
+
+
+class TestBatchScheduler(unittest.TestCase):
+    """Test request grouping without calling the Whisper API."""
+
+    class FakeHandler:
+        """Echoes the audio back as its transcription."""
+
+        def transcribe_audio(
+            self, audio_data, audio_format="wav", language=None, prompt=None
+        ):
+            if audio_data == b"bad":
+                raise ValueError("Invalid audio")
+            return audio_data.decode()
+
+    def test_results_reach_their_callers(self):
+        """Each caller gets its own transcription or error back."""
+        scheduler = BatchScheduler(max_wait_ms=10)
+        handler = self.FakeHandler()
+        try:
+            futures = [
+                scheduler.submit(handler, data) for data in (b"short", b"x" * 12)
+            ]
+            failed = scheduler.submit(handler, b"bad")
+
+            self.assertEqual(futures[0].result(timeout=5), "short")
+            self.assertEqual(futures[1].result(timeout=5), "x" * 12)
+            with self.assertRaises(ValueError):
+                failed.result(timeout=5)
+            self.assertEqual(
+                scheduler.transcribe_audio(handler, b"alone"), "alone"
+            )
+        finally:
+            scheduler.shutdown()
 
 
 def run_standalone_test():
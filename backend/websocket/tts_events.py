@@ -71,7 +71,7 @@ def register_tts_events(socketio, app):
             )
 
             stream_state = stream_tracker[session_id]
-            stream_state["start_time"] = time.time()
+            stream_state["start_time"] = time.perf_counter()
 
             # Stream frames in real-time as they're generated
             app_instance.logger.info("Starting real-time audio frame streaming...")
@@ -79,7 +79,7 @@ def register_tts_events(socketio, app):
 
             try:
                 for frame_data in my_processing_function_streaming(
-                    text, app_instance.logger
+                    text, app_instance.logger, frame_ms=FRAME_DURATION_MS
                 ):
                     # Check if stream should stop
                     if stream_state["should_stop"]:
@@ -97,7 +97,7 @@ def register_tts_events(socketio, app):
 
                     # Log progress occasionally (every 1 second worth of frames = 50 frames)
                     if frame_count % 50 == 0:
-                        elapsed_time = time.time() - stream_state["start_time"]
+                        elapsed_time = time.perf_counter() - stream_state["start_time"]
                         app_instance.logger.info(
                             f"Session {session_id}: Real-time streamed {frame_count} frames in {elapsed_time:.2f}s"
                         )
@@ -116,7 +116,7 @@ def register_tts_events(socketio, app):
                 return
 
             # Stream completed successfully
-            actual_duration = time.time() - stream_state["start_time"]
+            actual_duration = time.perf_counter() - stream_state["start_time"]
 
             # Signal completion to specific client
             socketio_instance.emit(
@@ -6,7 +6,7 @@ Handles voice recording, transcription, and integration with conversation pipeli
 from flask import request
 from flask_socketio import emit
 import base64
-from services.whisper_handler import create_whisper_handler
+from services.whisper_handler import create_whisper_handler, get_batch_scheduler
 from services.openai_handler import create_conversation_manager
 
 # Global conversation manager for voice interactions
@@ -252,7 +252,7 @@ def _process_complete_audio(session_id, app, voice_sessions, audio_format=None):
                 audio_format = "wav"  # Default
 
         # Validate audio
-        if not whisper_handler.validate_audio_format(total_audio):
+        if not whisper_handler.validate_audio_format(total_audio, audio_format):
             emit(
                 "transcription_error",
                 {"error": "Invalid audio format or corrupted audio data"},
@@ -263,9 +263,26 @@ def _process_complete_audio(session_id, app, voice_sessions, audio_format=None):
         audio_info = whisper_handler.get_audio_info(total_audio, audio_format)
         app.logger.info(f"Audio info: {audio_info}")
 
-        # Transcribe audio using Whisper
-        app.logger.info("Sending audio to Whisper for transcription...")
-        transcribed_text = whisper_handler.transcribe_audio(total_audio, audio_format)
+        # Transcribe audio using Whisper, skipping the round trip for silence
+        if whisper_handler.has_audio_signal(total_audio, audio_format):
+            # Recent conversation helps Whisper with names and vocabulary
+            conversation_manager = get_or_create_voice_conversation_manager(
+                app.logger
+            )
+            prompt = (
+                conversation_manager.get_conversation_context()
+                if conversation_manager
+                else None
+            )
+
+            app.logger.info("Sending audio to Whisper for transcription...")
+            # Grouped with other sessions' concurrent transcriptions
+            transcribed_text = get_batch_scheduler().transcribe_audio(
+                whisper_handler, total_audio, audio_format, prompt=prompt
+            )
+        else:
+            app.logger.info("Audio is silent, skipping Whisper transcription")
+            transcribed_text = ""
 
         app.logger.info(f"Transcription complete: '{transcribed_text}'")
 
@@ -411,17 +428,20 @@ def _trigger_auto_tts(text, app):
         # Stream frames in real-time as they're generated
         app.logger.info("Starting real-time voice auto-TTS streaming...")
         frame_count = 0
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
-            for audio_chunk in my_processing_function_streaming(text, app.logger):
+            # 20ms frames to match the fixed pacing below
+            for audio_chunk in my_processing_function_streaming(
+                text, app.logger, frame_ms=20
+            ):
                 # Send frame immediately as it's generated
                 emit("pcm_frame", list(audio_chunk))
                 frame_count += 1
 
                 # Log progress occasionally
                 if frame_count % 50 == 0:
-                    elapsed_time = time.time() - start_time
+                    elapsed_time = time.perf_counter() - start_time
                     app.logger.info(
                         f"Voice auto-TTS: Real-time streamed {frame_count} frames in {elapsed_time:.2f}s"
                     )
@@ -438,7 +458,7 @@ def _trigger_auto_tts(text, app):
             return
 
         # Calculate final metrics
-        actual_duration = time.time() - start_time
+        actual_duration = time.perf_counter() - start_time
 
         app.logger.info(
             f"Voice auto-TTS real-time streaming completed: {frame_count} frames in {actual_duration:.2f}s"